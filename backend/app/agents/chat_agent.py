@@ -1,211 +1,321 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_community.tools import DuckDuckGoSearchResults
 from app.core.config import settings
-from typing import List, Optional
+from app.core.llm import (
+    llm_manager, is_rate_limit_error, parse_json_response, BudgetExceededError, CircuitOpenError
+)
+from app.core.ledger import llm_ledger
+from app.services.corpus import article_corpus
+from app.services.extractive import compress_text
+from typing import AsyncIterator, List, Optional, Tuple
+import ast
+import asyncio
 import json
 
-def get_llm():
-    """Get Gemini LLM instance"""
-    if not settings.GOOGLE_API_KEY:
-        return None
-    return ChatGoogleGenerativeAI(
-        # Requested lightweight model; change here if you upgrade quota
-        model="gemini-2.5-flash",
-        google_api_key=settings.GOOGLE_API_KEY,
-        temperature=0.7
-    )
+# Chat is more conversational than the summarization/translation endpoints
+CHAT_TEMPERATURE = 0.7
 
-async def chat_with_news(message: str, history: Optional[List[dict]] = None) -> dict:
-    """Chat about news topics using Gemini with web search"""
-    llm = get_llm()
-    if not llm:
-        return {
-            "response": "AI chat is not available. Please configure GOOGLE_API_KEY.",
-            "sources": []
-        }
-    
-    try:
-        # Search for relevant news first, but fail gracefully on rate limits/errors
-        context = ""
-        sources: List[str] = []
-        has_search_results = False
-        
-        # Only search if the message seems to be asking about news/current events
-        message_lower = message.lower()
-        is_news_query = any(keyword in message_lower for keyword in [
-            "news", "article", "summary", "latest", "recent", "today", "current", 
-            "happening", "event", "story", "report", "update"
-        ])
-        
-        if is_news_query or len(message) > 10:
-            try:
-                search_query = f"{message} news" if "news" not in message_lower else message
-                search_tool = DuckDuckGoSearchResults(max_results=5)
-                search_results = search_tool.invoke(search_query)
-
-                items = []
-                if isinstance(search_results, list):
-                    items = search_results
-                elif isinstance(search_results, str):
-                    text = search_results.strip()
-                    if text.startswith("["):
-                        try:
-                            items = json.loads(text)
-                        except Exception:
-                            try:
-                                items = eval(text, {"__builtins__": {}}) if text.startswith("[") else []
-                            except Exception:
-                                items = []
-                elif isinstance(search_results, dict):
-                    possible_items = search_results.get("results") or search_results.get("data") or []
-                    if isinstance(possible_items, list):
-                        items = possible_items
-
-                for item in items:
-                    if item.get('title') and item.get('snippet'):
-                        context += f"- {item.get('title', '')}: {item.get('snippet', '')}\n"
-                        link = item.get("link")
-                        if link and link.startswith("http"):
-                            sources.append(link)
-                        has_search_results = True
-            except Exception as search_err:
-                # Search failed, but we'll continue without it
-                pass
-        
-        # Build conversation history
-        system_content = """You are a helpful AI news assistant. You can:
+CHAT_SYSTEM_PROMPT = """You are a helpful AI news assistant. You can:
 1. Answer questions about current events and news topics
 2. Provide summaries of news articles when asked
 3. Discuss general topics related to news and current affairs
 4. Be friendly and conversational
 
 If you have search results, use them to provide accurate information. If you don't have specific search results, you can still answer general questions or provide helpful responses based on your knowledge. Always be helpful and informative."""
-        
-        messages = [SystemMessage(content=system_content)]
-        
-        if history:
-            for msg in history[-5:]:  # Last 5 messages for context
-                if msg.get("role") == "user":
-                    messages.append(HumanMessage(content=msg.get("content", "")))
-                else:
-                    # Use AIMessage for assistant turns to avoid duplicate system msgs
-                    messages.append(AIMessage(content=msg.get("content", "")))
-        
-        # Build prompt based on whether we have search results
-        if has_search_results and context:
-            prompt = f"""Recent news context from search:
+
+NEWS_KEYWORDS = [
+    "news", "article", "summary", "latest", "recent", "today", "current",
+    "happening", "event", "story", "report", "update"
+]
+
+def parse_search_results(search_results) -> List[dict]:
+    """Normalize DuckDuckGoSearchResults output (list, JSON/Python-literal string or dict) to a list of dicts"""
+    items = []
+    if isinstance(search_results, list):
+        items = search_results
+    elif isinstance(search_results, str):
+        text = search_results.strip()
+        if text.startswith("["):
+            try:
+                items = json.loads(text)
+            except Exception:
+                try:
+                    items = ast.literal_eval(text)
+                except Exception:
+                    items = []
+    elif isinstance(search_results, dict):
+        possible_items = search_results.get("results") or search_results.get("data") or []
+        if isinstance(possible_items, list):
+            items = possible_items
+    return [item for item in items if isinstance(item, dict)]
+
+async def search_news(query: str, max_results: int = 5, timeout: Optional[float] = None) -> List[dict]:
+    """
+    Search DuckDuckGo without blocking the event loop.
+    Returns [] on errors or when the search doesn't finish within the timeout.
+    """
+    timeout = settings.CHAT_SEARCH_TIMEOUT if timeout is None else timeout
+    search_tool = DuckDuckGoSearchResults(max_results=max_results)
+    try:
+        results = await asyncio.wait_for(search_tool.ainvoke(query), timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"Search timed out after {timeout}s: {query}")
+        return []
+    except Exception as e:
+        print(f"Search failed: {e}")
+        return []
+    return parse_search_results(results)
+
+def _should_search(message: str) -> bool:
+    # Only search if the message seems to be asking about news/current events
+    message_lower = message.lower()
+    return any(keyword in message_lower for keyword in NEWS_KEYWORDS) or len(message) > 10
+
+def _build_context(passages: List[dict], items: List[dict]) -> Tuple[str, List[str]]:
+    """
+    Context lines from local corpus passages followed by web search snippets.
+    Passages from the same article are joined and extractively compressed to
+    CONTEXT_PASSAGE_TOKEN_BUDGET (CPU-bound; callers run this in an executor).
+    Snippets are only a sentence or two and go in as they are.
+    """
+    context = ""
+    sources: List[str] = []
+    articles = {}
+    for passage in passages:
+        article = articles.setdefault(passage["url"], {"title": passage["title"], "texts": []})
+        article["texts"].append(passage["text"])
+    for url, article in articles.items():
+        text = compress_text(" ".join(article["texts"]), max_tokens=settings.CONTEXT_PASSAGE_TOKEN_BUDGET)
+        context += f"- {article['title']}: {text}\n"
+        sources.append(url)
+    for item in items:
+        if item.get('title') and item.get('snippet'):
+            context += f"- {item.get('title', '')}: {item.get('snippet', '')}\n"
+            link = item.get("link")
+            if link and link.startswith("http") and link not in sources:
+                sources.append(link)
+    return context, sources
+
+def _build_history(history: Optional[List[dict]], summary: str = "") -> list:
+    system_content = CHAT_SYSTEM_PROMPT
+    if summary:
+        # Older turns of a server-side session, compressed by chat_sessions
+        system_content += f"\n\nSummary of the earlier conversation:\n{summary}"
+    messages = [SystemMessage(content=system_content)]
+    if history:
+        for msg in history:  # Turns not yet in the summary, verbatim
+            if msg.get("role") == "user":
+                messages.append(HumanMessage(content=msg.get("content", "")))
+            else:
+                # Use AIMessage for assistant turns to avoid duplicate system msgs
+                messages.append(AIMessage(content=msg.get("content", "")))
+    return messages
+
+def _build_prompt(message: str, context: str) -> str:
+    # Build prompt based on whether we have search results
+    if context:
+        return f"""Recent news context:
 {context}
 
 User question: {message}
 
 Please answer the user's question using the news context above. If the question asks for a summary, provide a concise summary."""
-        else:
-            # No search results, but still try to help
-            if "summary" in message_lower and "article" in message_lower:
-                prompt = f"""User is asking: {message}
+
+    # No search results, but still try to help
+    message_lower = message.lower()
+    if "summary" in message_lower and "article" in message_lower:
+        return f"""User is asking: {message}
 
 The user wants a summary of an article. Since I don't have access to the specific article content, please explain that you'd need the article text or URL to provide a summary. However, if the user mentioned a topic (like "{message}"), you can provide general information about that topic."""
-            else:
-                prompt = f"""User question: {message}
+    return f"""User question: {message}
 
 Please answer the user's question helpfully. You can provide general information, discuss news topics, or help with questions about current events."""
-        
-        messages.append(HumanMessage(content=prompt))
+
+async def prepare_chat(
+    message: str,
+    history: Optional[List[dict]] = None,
+    summary: str = ""
+) -> Tuple[list, str, List[str]]:
+    """
+    Retrieve context and build the chat messages.
+
+    Passages from the local article corpus are used first; web search only
+    runs when they don't cover the question, in the background while the
+    conversation history is assembled.
+    Returns (messages, context, sources).
+    """
+    hits = article_corpus.search(message, k=settings.CORPUS_TOP_K)
+    passages = [h for h in hits if h["coverage"] >= settings.CORPUS_MIN_COVERAGE]
+
+    search_task = None
+    if not article_corpus.has_good_recall(hits) and _should_search(message):
+        search_query = f"{message} news" if "news" not in message.lower() else message
+        search_task = asyncio.create_task(search_news(search_query))
+
+    messages = _build_history(history, summary)
+
+    # Search failures and timeouts just mean answering without web context
+    items = await search_task if search_task else []
+    loop = asyncio.get_running_loop()
+    context, sources = await loop.run_in_executor(None, _build_context, passages, items)
+
+    messages.append(HumanMessage(content=_build_prompt(message, context)))
+    return messages, context, sources
+
+def chat_error_response(e: Exception, context: str, sources: List[str]) -> dict:
+    """
+    Provide a helpful response even if the LLM fails. Fallbacks are flagged
+    with "error" so they aren't kept in the session as the assistant's answer.
+    """
+    if isinstance(e, (BudgetExceededError, CircuitOpenError)) and context:
+        llm_ledger.record_degraded("chat")
+        return {
+            "response": f"I can't write a full answer right now, but here is what I found:\n{context}",
+            "sources": sources[:3],
+            "error": True
+        }
+    if is_rate_limit_error(e):
+        return {
+            "response": "I'm currently experiencing high demand. Please try again in a moment. In the meantime, you can browse the news feed for the latest articles!",
+            "sources": [],
+            "error": True
+        }
+    return {
+        "response": f"I encountered a technical issue: {str(e)}. Please try rephrasing your question or try again later.",
+        "sources": sources[:3] if sources else [],
+        "error": True
+    }
+
+async def chat_with_news(message: str, history: Optional[List[dict]] = None, summary: str = "") -> dict:
+    """Chat about news topics using Gemini with web search"""
+    if not llm_manager.is_configured():
+        return {
+            "response": "AI chat is not available. Please configure GOOGLE_API_KEY.",
+            "sources": [],
+            "error": True
+        }
+    
+    try:
+        messages, context, sources = await prepare_chat(message, history, summary)
         
         try:
-            response = llm.invoke(messages)
+            response = await llm_manager.ainvoke(
+                messages, endpoint="chat", temperature=CHAT_TEMPERATURE
+            )
             return {
                 "response": response.content,
                 "sources": sources[:3] if sources else []
             }
         except Exception as e:
-            error_msg = str(e)
-            # Provide a helpful response even if LLM fails
-            if "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
-                return {
-                    "response": "I'm currently experiencing high demand. Please try again in a moment. In the meantime, you can browse the news feed for the latest articles!",
-                    "sources": []
-                }
-            return {
-                "response": f"I encountered a technical issue: {error_msg}. Please try rephrasing your question or try again later.",
-                "sources": sources[:3] if sources else []
-            }
+            return chat_error_response(e, context, sources)
     except Exception as e:
         return {
             "response": f"Sorry, I encountered an error: {str(e)}. Please try again or rephrase your question.",
-            "sources": []
+            "sources": [],
+            "error": True
         }
 
-async def generate_daily_digest(categories: Optional[List[str]] = None) -> dict:
-    """Generate a daily news digest"""
-    llm = get_llm()
-    if not llm:
-        return {
-            "digest": "Daily digest is not available. Please configure GOOGLE_API_KEY.",
-            "headlines": [],
-            "generated_at": ""
+async def stream_chat(
+    message: str,
+    history: Optional[List[dict]] = None,
+    summary: str = ""
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Chat as a stream of (event, data) pairs: "sources" once the search is done,
+    then "token" chunks and a final "done". If generation fails before any
+    token, a single "response" event carries the same fallback /chat returns.
+    """
+    if not llm_manager.is_configured():
+        yield "response", {
+            "response": "AI chat is not available. Please configure GOOGLE_API_KEY.",
+            "sources": [],
+            "error": True
         }
-    
+        return
+
+    messages, context, sources = await prepare_chat(message, history, summary)
+    yield "sources", {"sources": sources[:3]}
+
+    streamed = False
     try:
-        from datetime import datetime
-        
-        cats = categories or ["Technology", "Business", "Science"]
-        search_tool = DuckDuckGoSearchResults(max_results=15)
-        
-        # Search for news in each category
-        all_news = []
-        for cat in cats[:3]:  # Limit to 3 categories
-            results = search_tool.invoke(f"{cat} news today")
-            if isinstance(results, str):
-                try:
-                    items = eval(results) if results.startswith("[") else []
-                    for item in items[:3]:  # Top 3 per category
-                        all_news.append({
-                            "category": cat,
-                            "title": item.get("title", ""),
-                            "snippet": item.get("snippet", "")
-                        })
-                except:
-                    pass
-        
-        if not all_news:
-            return {
-                "digest": "No news available at this time.",
-                "headlines": [],
-                "generated_at": datetime.now().isoformat()
-            }
-        
-        prompt = f"""Create a brief daily news digest from these stories:
+        async for chunk in llm_manager.astream(messages, endpoint="chat", temperature=CHAT_TEMPERATURE):
+            if chunk.content:
+                streamed = True
+                yield "token", {"text": chunk.content}
+    except Exception as e:
+        print(f"Chat streaming error: {e}")
+        if streamed:
+            yield "error", {"detail": "The answer was interrupted. Please try again."}
+        else:
+            yield "response", chat_error_response(e, context, sources)
+        return
+    yield "done", {}
 
-{json.dumps(all_news, indent=2)}
+async def generate_category_fragment(category: str) -> dict:
+    """
+    Digest fragment for one category: a short summary of today's top stories
+    plus their headlines. Fragments are shared by every digest that includes
+    the category (see app/services/digest.py).
+    """
+    items = await search_news(
+        f"{category} news today", max_results=15, timeout=settings.DIGEST_SEARCH_TIMEOUT
+    )
+    stories = [
+        {"title": item.get("title", ""), "snippet": item.get("snippet", "")}
+        for item in items if item.get("title")
+    ][:3]  # Top 3 per category
 
-Format your response as:
-1. A brief 2-3 paragraph summary of the most important news
-2. List the top 5 headlines
+    fragment = {"category": category, "summary": "", "headlines": [s["title"] for s in stories]}
+    if not stories:
+        return {**fragment, "degraded": True}
 
-Be concise and engaging."""
-        
-        response = llm.invoke([
+    def fallback() -> dict:
+        # Plain headline list built from the search results
+        llm_ledger.record_degraded("digest")
+        summary = "\n".join(f"- {s['title']}: {s['snippet']}" for s in stories)
+        return {**fragment, "summary": summary, "degraded": True}
+
+    if not llm_manager.is_available("digest"):
+        return fallback()
+
+    prompt = f"""Today's top {category} stories:
+
+{json.dumps(stories, indent=2)}
+
+Write 2-3 concise, engaging sentences summarizing the most important {category} news for a daily briefing.
+Respond with JSON only: {{"summary": "...", "headlines": ["short headline", ...]}} with at most 3 headlines."""
+
+    try:
+        response = await llm_manager.ainvoke([
             SystemMessage(content="You are a news anchor creating a daily briefing."),
             HumanMessage(content=prompt)
-        ])
-        
-        # Extract headlines (simple parsing)
-        headlines = []
-        for line in response.content.split("\n"):
-            if line.strip().startswith(("-", "•", "*")) or (len(line) > 5 and line[0].isdigit()):
-                headlines.append(line.strip().lstrip("-•*0123456789. "))
-        
+        ], endpoint="digest", temperature=CHAT_TEMPERATURE)
+        parsed = parse_json_response(response.content)
+        summary = str(parsed.get("summary") or "").strip()
+        if not summary:
+            # Valid JSON without a summary mustn't be cached as a good fragment
+            print(f"Digest fragment for {category} had no summary")
+            return fallback()
         return {
-            "digest": response.content,
-            "headlines": headlines[:5],
-            "generated_at": datetime.now().isoformat()
+            **fragment,
+            "summary": summary,
+            "headlines": [str(h) for h in parsed.get("headlines") or fragment["headlines"]][:3]
         }
     except Exception as e:
-        from datetime import datetime
-        return {
-            "digest": f"Error generating digest: {str(e)}",
-            "headlines": [],
-            "generated_at": datetime.now().isoformat()
-        }
+        print(f"Digest fragment for {category} failed: {e}")
+        return fallback()
+
+async def stitch_digest(fragments: List[dict]) -> str:
+    """
+    Optional final pass that rewrites per-category fragments into one flowing
+    briefing. Only the short fragment summaries are sent, so it is cheap.
+    """
+    sections = "\n\n".join(f"{f['category']}: {f['summary']}" for f in fragments)
+    response = await llm_manager.ainvoke([
+        SystemMessage(content="You are a news anchor creating a daily briefing."),
+        HumanMessage(content=f"""Combine these category summaries into a brief 2-3 paragraph daily news digest.
+Keep every fact, add smooth transitions, and don't invent anything new.
+
+{sections}""")
+    ], endpoint="digest_stitch", temperature=CHAT_TEMPERATURE)
+    return response.content.strip()
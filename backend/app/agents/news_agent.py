@@ -1,6 +1,5 @@
 from typing import TypedDict, List, Optional, Annotated
 from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_community.tools import DuckDuckGoSearchResults
 from app.core.config import settings
@@ -35,17 +34,6 @@ def get_news_agent():
     return _news_agent
 
 
-def get_llm():
-    """Get Gemini LLM instance"""
-    if not settings.GOOGLE_API_KEY:
-        return None
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=settings.GOOGLE_API_KEY,
-        temperature=0.3
-    )
-
-
 def detect_category_from_text(text: str, query: str = "", categories: List[str] = None) -> str:
     """Intelligently detect category from text content and query"""
     if not text:
@@ -179,7 +167,6 @@ def create_news_agent():
             if not raw_results:
                 return {**state, "curated_news": []}
             
-            llm = get_llm()
             query = state.get("query", "")
             
             # Fast path: Skip AI curation for speed, use intelligent category detection
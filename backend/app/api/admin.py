@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from app.core.ledger import llm_ledger
+from app.core.llm import llm_manager
+from app.services.extractive import get_compression_stats
+
+router = APIRouter()
+
+@router.get("/llm")
+async def get_llm_ledger():
+    """Get LLM usage per endpoint: tokens, latency, cost, cache hits and budgets"""
+    return {
+        "success": True,
+        "endpoints": llm_ledger.snapshot(),
+        "manager": llm_manager.get_stats(),
+        "compression": get_compression_stats()
+    }
@@ -1,21 +1,40 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from app.models.schemas import (
     NewsSearchRequest, NewsSearchResponse, NewsItem, TrendsRequest, 
     UserPreferences, ChatRequest, ChatResponse, DigestRequest, DigestResponse,
-    SummarizeRequest, SummarizeResponse, TranslateRequest, TranslateResponse, TTSRequest
+    SummarizeRequest, SummarizeResponse, BatchSummarizeRequest, TranslateRequest, TranslateResponse,
+    FeedTranslateRequest, FeedTranslateResponse, TTSRequest
 )
-from app.agents.news_agent import get_news_agent, get_llm
-from app.agents.chat_agent import chat_with_news, generate_daily_digest
+from app.agents.news_agent import get_news_agent
+from app.agents.chat_agent import chat_with_news, stream_chat
 from app.core.config import settings
+from app.core.llm import llm_manager, LLMUnavailableError
+from app.core.ledger import llm_ledger
 from app.core.supabase import supabase
 from app.services.news_api import news_api_service
-from app.services.scraper import fetch_article_content
-from app.services.audio import text_to_speech
-from app.services.youtube_service import fetch_news_videos, fetch_trending_news_videos
-from app.core.filtering import filter_accessible_items, is_domain_accessible
+from app.services.scraper import fetch_article_content, get_scrape_stats
+from app.services.summarizer import (
+    summarize_and_store, stream_summary, summarize_batch, get_cached_summary,
+    get_summary_cache_stats, local_summary, ENGINE_LLM, ENGINE_EXTRACTIVE
+)
+from app.services.prefetch import prefetch_queue, prefetch_top_items
+from app.services.translation import (
+    translate_text as translate_with_memory, translate_texts, get_translation_stats,
+    TranslationError
+)
+from app.services.chat_sessions import chat_sessions
+from app.services.corpus import article_corpus
+from app.services.digest import digest_service, UnknownCategoryError
+from app.services.transcript import get_transcript, is_youtube_url, get_transcript_stats
+from app.services.audio import synthesize_speech, stream_speech, split_speech_chunks, audio_cache
+from app.services.youtube_service import (
+    fetch_youtube_videos, fetch_news_videos, fetch_trending_news_videos, get_youtube_stats,
+    get_video_cache_stats
+)
+from app.core.filtering import filter_accessible_items, is_domain_accessible, domain_health
 from typing import List, Optional
-from langchain_core.messages import HumanMessage, SystemMessage
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from urllib.parse import urlencode
 import json
 
 router = APIRouter()
@@ -42,6 +61,7 @@ async def search_news(request: NewsSearchRequest):
             print(f"Agent error: {result['error']}")
         
         news_items = [NewsItem(**item) for item in result.get("final_news", [])]
+        await article_corpus.add_items(item.model_dump() for item in filter_accessible_items(news_items))
 
         return NewsSearchResponse(
             success=True,
@@ -73,7 +93,11 @@ async def get_trends(category: str, limit: int = 25):
         }
         
         result = await news_agent.ainvoke(initial_state)
-        news_items = [NewsItem(**item) for item in result.get("final_news", [])]
+        news_items = filter_accessible_items(
+            [NewsItem(**item) for item in result.get("final_news", [])]
+        )
+        prefetch_top_items(news_items[:limit])
+        await article_corpus.add_items(item.model_dump() for item in news_items)
         
         return {
             "success": True,
@@ -90,86 +114,227 @@ async def get_trends(category: str, limit: int = 25):
 async def summarize_article(request: SummarizeRequest):
     """Summarize a news article from a URL"""
     try:
-        # Fetch content
-        result = await fetch_article_content(request.url)
-        if not result or not result.get("content"):
-            raise HTTPException(
-                status_code=400, 
-                detail="Access to this article is restricted by the publisher. Please try a different source for your summary. Thank you!"
-            )
-
-        content = result["content"]
-        title = result.get("title", "")
-        
-        # Ensure we have enough content to summarize
-        if len(content) < 100:
-             raise HTTPException(
-                status_code=400, 
-                detail="Extracted content is too short to summarize."
-            )
+        async with prefetch_queue.interactive():
+            return await _summarize_article(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Summarization error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        llm = get_llm()
-        if not llm:
-            raise HTTPException(status_code=500, detail="LLM service not available")
+RESTRICTED_ARTICLE_DETAIL = "Access to this article is restricted by the publisher. Please try a different source for your summary. Thank you!"
 
-        # Summarize using LLM
-        prompt = f"""Summarize the following article text into a concise and engaging summary (max 300 words).
-        
-        Article Title: {title}
-        Article Text:
-        {content[:15000]}  # Increased limit for better context
-        """
+async def _load_article(url: str) -> dict:
+    """Scrape an article (or a video's transcript) for summarization, raising HTTPException if it can't be used"""
+    if is_youtube_url(url):
+        transcript = await get_transcript(url)
+        if not transcript:
+            raise HTTPException(
+                status_code=400,
+                detail="No English or Hindi captions are available for this video."
+            )
+        return transcript
+
+    # Don't waste a fetch on publishers we already know we cannot read
+    if not is_domain_accessible(url):
+        raise HTTPException(status_code=400, detail=RESTRICTED_ARTICLE_DETAIL)
+
+    # Fetch content
+    result = await fetch_article_content(url)
+    if not result or not result.get("content"):
+        raise HTTPException(status_code=400, detail=RESTRICTED_ARTICLE_DETAIL)
+
+    # Ensure we have enough content to summarize
+    if len(result["content"]) < 100:
+         raise HTTPException(
+            status_code=400, 
+            detail="Extracted content is too short to summarize."
+        )
+    return result
 
-        try:
-            response = await llm.ainvoke([
-                SystemMessage(content="You are a helpful news summarizer."),
-                HumanMessage(content=prompt)
-            ])
-            summary = response.content
-        except Exception as e:
-            print(f"LLM Summarization error: {e}")
-            raise HTTPException(status_code=500, detail="Failed to generate summary with AI.")
+async def _summarize_article(request: SummarizeRequest) -> SummarizeResponse:
+    result = await _load_article(request.url)
+    content = result["content"]
+    title = result.get("title", "")
 
+    def respond(summary: str, engine: str, cached: bool = False) -> SummarizeResponse:
         return SummarizeResponse(
             summary=summary,
             title=title,
-            original_text=content[:500] + "..." # truncated
+            original_text=content[:500] + "...", # truncated
+            engine=engine,
+            cached=cached
         )
-    except HTTPException:
-        raise
+
+    if request.mode == "fast":
+        return respond(local_summary(content), ENGINE_EXTRACTIVE)
+
+    summary = await get_cached_summary(request.url, content)
+    if summary:
+        return respond(summary, ENGINE_LLM, cached=True)
+
+    if not llm_manager.is_available("summarize"):
+        # No key, circuit open or budget spent: answer locally instead of failing
+        llm_ledger.record_degraded("summarize")
+        return respond(local_summary(content), ENGINE_EXTRACTIVE)
+
+    try:
+        summary = await summarize_and_store(request.url, title, content)
     except Exception as e:
-        print(f"Summarization error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        print(f"LLM Summarization error: {e}")
+        llm_ledger.record_degraded("summarize")
+        return respond(local_summary(content), ENGINE_EXTRACTIVE)
+
+    return respond(summary, ENGINE_LLM)
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/summarize/stream")
+async def summarize_article_stream(request: SummarizeRequest):
+    """
+    Summarize a news article, streaming progress and summary tokens as
+    Server-Sent Events: "status" while scraping, then "token" events and a
+    final "done". Cached summaries arrive as a single "summary" event.
+    """
+    async def event_stream():
+        async with prefetch_queue.interactive():
+            yield sse_event("status", {"stage": "scraping"})
+            try:
+                result = await _load_article(request.url)
+            except HTTPException as e:
+                yield sse_event("error", {"detail": e.detail})
+                return
+
+            content = result["content"]
+            title = result.get("title", "")
+            original_text = content[:500] + "..."
+
+            def summary_event(summary: str, engine: str, cached: bool = False) -> str:
+                return sse_event("summary", {
+                    "summary": summary,
+                    "title": title,
+                    "original_text": original_text,
+                    "engine": engine,
+                    "cached": cached
+                })
+
+            if request.mode == "fast":
+                yield summary_event(local_summary(content), ENGINE_EXTRACTIVE)
+                return
+
+            summary = await get_cached_summary(request.url, content)
+            if summary:
+                yield summary_event(summary, ENGINE_LLM, cached=True)
+                return
+
+            if not llm_manager.is_available("summarize"):
+                llm_ledger.record_degraded("summarize")
+                yield summary_event(local_summary(content), ENGINE_EXTRACTIVE)
+                return
+
+            yield sse_event("status", {"stage": "summarizing", "title": title})
+            streamed = False
+            try:
+                async for token in stream_summary(request.url, title, content):
+                    streamed = True
+                    yield sse_event("token", {"text": token})
+            except Exception as e:
+                print(f"LLM Summarization error: {e}")
+                if streamed:
+                    yield sse_event("error", {"detail": "Failed to generate summary with AI."})
+                else:
+                    llm_ledger.record_degraded("summarize")
+                    yield summary_event(local_summary(content), ENGINE_EXTRACTIVE)
+                return
+            yield sse_event("done", {"title": title, "original_text": original_text, "engine": ENGINE_LLM})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/summarize/batch")
+async def summarize_articles_batch(request: BatchSummarizeRequest):
+    """
+    Summarize many articles at once, streaming a Server-Sent "result" event per
+    unique URL as it completes, followed by a final "done" event.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="No URLs provided")
+    if len(request.urls) > settings.BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_MAX_URLS} URLs can be summarized per batch"
+        )
+
+    async def event_stream():
+        completed = 0
+        async with prefetch_queue.interactive():
+            async for result in summarize_batch(request.urls):
+                completed += 1
+                yield sse_event("result", result)
+        yield sse_event("done", {"total": completed})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/translate", response_model=TranslateResponse)
 async def translate_text(request: TranslateRequest):
     """Translate text to target language"""
     try:
-        llm = get_llm()
-        if not llm:
+        if not llm_manager.is_configured():
             raise HTTPException(status_code=500, detail="LLM service not available")
 
-        language_map = {
-            "hi": "Hindi",
-            "en": "English"
-        }
-        target_lang = language_map.get(request.target_language, "English")
-
-        prompt = f"""Translate the following text to {target_lang}. Preserve the meaning and tone.
-
-        Text:
-        {request.text}
-        """
-
-        response = await llm.ainvoke([
-            SystemMessage(content=f"You are a professional translator for {target_lang}."),
-            HumanMessage(content=prompt)
-        ])
+        # Only sentences missing from the translation memory reach Gemini
+        translated = await translate_with_memory(request.text, request.target_language)
 
         return TranslateResponse(
-            translated_text=response.content,
+            translated_text=translated,
             source_language="auto"
         )
+    except HTTPException:
+        raise
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TranslationError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/translate/feed", response_model=FeedTranslateResponse)
+async def translate_feed(request: FeedTranslateRequest):
+    """Translate the titles and summaries of a page of news items in bulk"""
+    try:
+        if not llm_manager.is_configured():
+            raise HTTPException(status_code=500, detail="LLM service not available")
+
+        items = request.items
+        # Titles and summaries share memory lookups and batched prompts;
+        # results come back in input order
+        texts = [item.title for item in items] + [item.summary for item in items]
+        translated = await translate_texts(texts, request.target_language)
+
+        translated_items = [
+            item.model_copy(update={"title": translated[i], "summary": translated[len(items) + i]})
+            for i, item in enumerate(items)
+        ]
+        return FeedTranslateResponse(
+            success=True,
+            items=translated_items,
+            target_language=request.target_language
+        )
+    except HTTPException:
+        raise
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TranslationError as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -177,14 +342,39 @@ async def translate_text(request: TranslateRequest):
 async def speak_text(request: TTSRequest):
     """Convert text to speech"""
     try:
-        audio_stream = await text_to_speech(request.text, request.language)
-        if not audio_stream:
+        audio_id = audio_cache.make_key(request.text, request.language)
+        path = audio_cache.get(audio_id)
+
+        if not path and len(split_speech_chunks(request.text)) > 1:
+            # Long text: stream sentence chunks as they are synthesized.
+            # The assembled clip becomes available at /audio/{audio_id} afterwards.
+            return StreamingResponse(
+                stream_speech(request.text, request.language),
+                media_type="audio/mpeg",
+                headers={"X-Audio-Id": audio_id}
+            )
+
+        path = path or await synthesize_speech(request.text, request.language)
+        if not path:
             raise HTTPException(status_code=500, detail="Could not generate audio")
 
-        return StreamingResponse(audio_stream, media_type="audio/mpeg")
+        # FileResponse streams from disk and honours Range requests for seeking
+        return FileResponse(path, media_type="audio/mpeg", headers={"X-Audio-Id": audio_id})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/audio/{audio_id}")
+async def get_audio(audio_id: str):
+    """Serve previously generated speech by the X-Audio-Id returned from /speak"""
+    if not audio_cache.is_valid_key(audio_id):
+        raise HTTPException(status_code=400, detail="Invalid audio id")
+    path = audio_cache.get(audio_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return FileResponse(path, media_type="audio/mpeg")
+
 @router.get("/categories")
 async def get_categories():
     """Get all available news categories"""
@@ -195,6 +385,7 @@ async def get_personalized_feed(categories: str = "", limit: int = 25):
     """Get personalized news feed based on user preferences"""
     try:
         category_list = [c.strip() for c in categories.split(",") if c.strip()]
+        news_agent = get_news_agent()
         
         if not category_list:
             # If no categories specified (and no preferences), search broad "latest news"
@@ -202,7 +393,6 @@ async def get_personalized_feed(categories: str = "", limit: int = 25):
             category_list = []
             query = "latest news"
         else:
-            news_agent = get_news_agent()
             query = " OR ".join([f"{cat} news" for cat in category_list[:3]])
         
         initial_state = {
@@ -218,6 +408,8 @@ async def get_personalized_feed(categories: str = "", limit: int = 25):
         result = await news_agent.ainvoke(initial_state)
         news_items = [NewsItem(**item) for item in result.get("final_news", [])]
         filtered_items = filter_accessible_items(news_items)
+        prefetch_top_items(filtered_items[:limit])
+        await article_corpus.add_items(item.model_dump() for item in filtered_items)
         
         return {
             "success": True,
@@ -236,32 +428,115 @@ async def save_preferences(prefs: UserPreferences):
 
 # ============ NEW AI FEATURES ============
 
+async def _chat_session(request: ChatRequest) -> dict:
+    history = [{"role": m.role, "content": m.content} for m in (request.history or [])]
+    return await chat_sessions.get_or_create(request.session_id, history)
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Chat with AI about news topics"""
     try:
-        history = [{"role": m.role, "content": m.content} for m in (request.history or [])]
-        result = await chat_with_news(request.message, history)
+        session = await _chat_session(request)
+        result = await chat_with_news(
+            request.message, chat_sessions.recent_history(session), session["summary"]
+        )
+        if not result.get("error"):
+            await chat_sessions.record_exchange(session, request.message, result["response"])
         return ChatResponse(
             response=result["response"],
-            sources=result.get("sources", [])
+            sources=result.get("sources", []),
+            session_id=session["id"]
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Chat with AI about news topics, streamed as Server-Sent Events:
+    "session" and "sources" first, then "token" events and a final "done".
+    Generation stops as soon as the client disconnects.
+    """
+    session = await _chat_session(request)
+
+    async def event_stream():
+        yield sse_event("session", {"session_id": session["id"]})
+        events = stream_chat(
+            request.message, chat_sessions.recent_history(session), session["summary"]
+        )
+        answer = []
+        completed = False
+        try:
+            async for event, data in events:
+                if await http_request.is_disconnected():
+                    print("Chat client disconnected, stopping generation")
+                    break
+                if event == "token":
+                    answer.append(data["text"])
+                elif event == "response":
+                    answer.append(data["response"])
+                # Fallback replies (data["error"]) aren't kept as the assistant's answer
+                completed = event == "done" or (event == "response" and not data.get("error"))
+                yield sse_event(event, data)
+        finally:
+            # Closes the upstream Gemini stream so unread tokens aren't generated
+            await events.aclose()
+            if completed:
+                await chat_sessions.record_exchange(session, request.message, "".join(answer))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/digest", response_model=DigestResponse)
 async def get_digest(request: DigestRequest):
     """Generate daily news digest"""
     try:
-        result = await generate_daily_digest(request.categories)
+        result = await digest_service.get_digest(request.categories)
         return DigestResponse(
             digest=result["digest"],
             headlines=result.get("headlines", []),
-            generated_at=result.get("generated_at", "")
+            generated_at=result.get("generated_at", ""),
+            cached=result.get("cached", False),
+            audio_url=_digest_audio_url(result)
         )
+    except UnknownCategoryError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _digest_audio_url(result: dict) -> Optional[str]:
+    if not settings.DIGEST_AUDIO_ENABLED or not result.get("audio_id"):
+        return None
+    categories = ",".join(result.get("categories", []))
+    return f"{settings.API_V1_STR}/news/digest/audio?{urlencode({'categories': categories})}"
+
+@router.get("/digest/audio")
+async def get_digest_audio(categories: str = ""):
+    """
+    Spoken briefing for the latest digest of the given comma-separated categories.
+    Returns 202 while it is still rendering, and 404 if no digest was generated
+    yet or spoken briefings are disabled (DIGEST_AUDIO_ENABLED).
+    """
+    if not settings.DIGEST_AUDIO_ENABLED:
+        raise HTTPException(status_code=404, detail="Spoken digests are disabled")
+    category_list = [c.strip() for c in categories.split(",") if c.strip()]
+    try:
+        digest, path = digest_service.get_digest_audio(category_list or None)
+    except UnknownCategoryError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if digest is None:
+        raise HTTPException(status_code=404, detail="No digest generated for these categories yet")
+    if path is None:
+        return JSONResponse(
+            status_code=202,
+            content={"success": False, "status": "rendering"},
+            headers={"Retry-After": "5"}
+        )
+    return FileResponse(path, media_type="audio/mpeg")
+
 @router.get("/related/{query}")
 async def get_related(query: str, limit: int = 5):
     """Get related articles based on a topic"""
@@ -289,6 +564,36 @@ async def get_related(query: str, limit: int = 5):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/domains/health")
+async def get_domain_health():
+    """Get per-domain scrape statistics and learned blocks"""
+    stats = domain_health.get_stats()
+    return {
+        "success": True,
+        "domains": stats,
+        "blocked": sorted(d for d, s in stats.items() if s["blocked"]),
+        "scrape": get_scrape_stats(),
+        "total": len(stats)
+    }
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get scrape/summary cache and background prefetch statistics"""
+    return {
+        "success": True,
+        "scrape": get_scrape_stats()["cache"],
+        "summary": get_summary_cache_stats(),
+        "translation": get_translation_stats(),
+        "transcripts": get_transcript_stats(),
+        "audio": audio_cache.stats(),
+        "youtube": get_youtube_stats(),
+        "prefetch": prefetch_queue.get_stats(),
+        "chat_sessions": chat_sessions.get_stats(),
+        "corpus": article_corpus.get_stats(),
+        "digest": digest_service.get_stats(),
+        "llm": llm_manager.get_stats()
+    }
+
 # ============ NEWSAPI.ORG DIRECT ENDPOINTS ============
 
 @router.get("/headlines")
@@ -358,7 +663,7 @@ async def get_sources(
 async def get_video_news(query: str = "latest news", limit: int = 15):
     """Get news videos from YouTube"""
     try:
-        videos = await fetch_news_videos(max_results=limit)
+        videos = await fetch_youtube_videos(query, limit)
         return {
             "success": True,
             "videos": videos,
@@ -368,6 +673,11 @@ async def get_video_news(query: str = "latest news", limit: int = 15):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/videos/quota")
+async def get_video_quota():
+    """Get YouTube quota usage and video cache statistics"""
+    return {"success": True, **get_video_cache_stats()}
+
 @router.get("/videos/trending")
 async def get_trending_videos(limit: int = 15):
     """Get trending news videos from YouTube"""
@@ -0,0 +1,330 @@
+"""
+Caching helpers shared by the scraper, summarizer and prefetcher
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from app.core.config import settings
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after a fixed TTL.
+
+    Not thread-safe; it is meant to be used from the event loop.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (value, time.time() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[1] >= time.time()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class PersistentCache:
+    """
+    SQLite-backed key/value cache with TTL and size-bounded LRU eviction.
+
+    Values are stored as JSON. Each cache lives in its own table so several
+    caches can share one database file. A ttl of None keeps entries forever
+    (they are still subject to max_entries eviction).
+
+    Recently used entries are also kept in a small in-memory LRU, so hot
+    keys are served without touching SQLite. Access times are only recorded
+    in memory and written back in batches (on set, or once flush_every are
+    pending), so a hit never costs a commit. Async callers should use
+    aget/aset, which run the SQLite work in the default executor.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 10000,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        memory_entries: int = settings.CACHE_MEMORY_ENTRIES,
+        flush_every: int = 256
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path or os.path.join(settings.CACHE_DIR, "cache.sqlite3")
+        self.memory_entries = memory_entries
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        # key -> (JSON value, expires_at); values are decoded on every hit so
+        # callers never share (and mutate) one cached object
+        self._memory: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._pending_access: Dict[str, float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so importing a module never touches the disk
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}" ('
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "{self.name}_last_access" '
+                f'ON "{self.name}" (last_access)'
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key: str, raw: str, expires_at: Optional[float]) -> None:
+        self._memory[key] = (raw, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_access(self, conn: sqlite3.Connection) -> None:
+        """Write pending access times; the caller commits."""
+        if self._pending_access:
+            conn.executemany(
+                f'UPDATE "{self.name}" SET last_access = ? WHERE key = ?',
+                [(at, key) for key, at in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                raw, expires_at = entry
+            else:
+                row = self._connect().execute(
+                    f'SELECT value, expires_at FROM "{self.name}" WHERE key = ?', (key,)
+                ).fetchone()
+                raw, expires_at = row if row is not None else (None, None)
+            if raw is None or (expires_at is not None and expires_at < now):
+                # Expired rows are left for the next eviction pass to delete
+                self._memory.pop(key, None)
+                self.misses += 1
+                return default
+            if entry is None:
+                self._remember(key, raw, expires_at)
+            self._pending_access[key] = now
+            if len(self._pending_access) >= self.flush_every:
+                conn = self._connect()
+                self._flush_access(conn)
+                conn.commit()
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        raw = json.dumps(value)
+        with self._lock:
+            conn = self._connect()
+            self._pending_access.pop(key, None)
+            self._flush_access(conn)
+            conn.execute(
+                f'INSERT OR REPLACE INTO "{self.name}" (key, value, expires_at, last_access) '
+                "VALUES (?, ?, ?, ?)",
+                (key, raw, expires_at, now)
+            )
+            self._evict(conn, now)
+            conn.commit()
+            self._remember(key, raw, expires_at)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Atomically add amount to an integer entry (missing entries count as 0)
+        and return the new value. Safe across processes sharing the database,
+        unlike a get() followed by a set().
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            conn = self._connect()
+            self._pending_access.pop(key, None)
+            # The upsert takes the write lock, so the SELECT sees this transaction's total
+            conn.execute(
+                f'INSERT INTO "{self.name}" (key, value, expires_at, last_access) VALUES (?, ?, ?, ?) '
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + ?, last_access = ?",
+                (key, json.dumps(amount), expires_at, now, amount, now)
+            )
+            value = conn.execute(
+                f'SELECT value FROM "{self.name}" WHERE key = ?', (key,)
+            ).fetchone()[0]
+            self._evict(conn, now)
+            conn.commit()
+            self._memory.pop(key, None)
+        return int(value)
+
+    async def aincrement(self, key: str, amount: int = 1) -> int:
+        """increment() for async callers; runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.increment, key, amount)
+
+    def update(self, key: str, fn: Callable[[Any], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Atomically replace an entry with fn(current value or None) and return
+        the result. The read and the write share one SQLite write transaction,
+        so concurrent updates from other processes are applied in turn rather
+        than overwriting each other. If fn returns None the entry is left
+        untouched. fn must not touch this cache.
+        """
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            conn = self._connect()
+            self._pending_access.pop(key, None)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    f'SELECT value, expires_at FROM "{self.name}" WHERE key = ?', (key,)
+                ).fetchone()
+                current = None
+                if row is not None and (row[1] is None or row[1] >= now):
+                    current = json.loads(row[0])
+                value = fn(current)
+                if value is None:
+                    conn.rollback()
+                    return None
+                raw = json.dumps(value)
+                self._flush_access(conn)
+                conn.execute(
+                    f'INSERT OR REPLACE INTO "{self.name}" (key, value, expires_at, last_access) '
+                    "VALUES (?, ?, ?, ?)",
+                    (key, raw, expires_at, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            self._remember(key, raw, expires_at)
+        return json.loads(raw)
+
+    async def aupdate(self, key: str, fn: Callable[[Any], Any], ttl: Optional[float] = None) -> Any:
+        """update() for async callers; runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.update, key, fn, ttl)
+
+    def flush(self) -> None:
+        """Write pending access times to disk."""
+        with self._lock:
+            if self._pending_access:
+                conn = self._connect()
+                self._flush_access(conn)
+                conn.commit()
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """get() for async callers: served from memory when hot, else off the event loop."""
+        with self._lock:
+            hot = key in self._memory and len(self._pending_access) + 1 < self.flush_every
+        if hot:
+            return self.get(key, default)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get, key, default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """set() for async callers; the write and commit run off the event loop."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.set, key, value, ttl)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """All unexpired (key, value) pairs, least recently used first. Doesn't count as access."""
+        with self._lock:
+            conn = self._connect()
+            self._flush_access(conn)
+            conn.commit()
+            rows = conn.execute(
+                f'SELECT key, value FROM "{self.name}" '
+                "WHERE expires_at IS NULL OR expires_at >= ? ORDER BY last_access",
+                (time.time(),)
+            ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            self._pending_access.pop(key, None)
+            conn = self._connect()
+            conn.execute(f'DELETE FROM "{self.name}" WHERE key = ?', (key,))
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            f'DELETE FROM "{self.name}" WHERE expires_at IS NOT NULL AND expires_at < ?', (now,)
+        )
+        count = conn.execute(f'SELECT COUNT(*) FROM "{self.name}"').fetchone()[0]
+        if count > self.max_entries:
+            victims = [row[0] for row in conn.execute(
+                f'SELECT key FROM "{self.name}" ORDER BY last_access ASC LIMIT ?',
+                (count - self.max_entries,)
+            )]
+            conn.executemany(f'DELETE FROM "{self.name}" WHERE key = ?', [(k,) for k in victims])
+            # Evicted keys mustn't keep being served from the memory layer
+            for key in victims:
+                self._memory.pop(key, None)
+                self._pending_access.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute(f'SELECT COUNT(*) FROM "{self.name}"').fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -1,8 +1,18 @@
 import os
+from typing import Dict
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def parse_key_values(value: str) -> Dict[str, str]:
+    """Parse "key=value,key=value" settings strings into a dict."""
+    pairs = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, val = item.split("=", 1)
+            pairs[key.strip()] = val.strip()
+    return pairs
+
 class Settings:
     PROJECT_NAME: str = "NewsFlow API"
     VERSION: str = "1.0.0"
@@ -11,6 +21,23 @@ class Settings:
     # Google Gemini API
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
     
+    # Gemini call limits, retries and circuit breaker
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_DEFAULT_ENDPOINT_CONCURRENCY: int = int(os.getenv("LLM_DEFAULT_ENDPOINT_CONCURRENCY", "4"))
+    # Per-endpoint overrides, e.g. "summarize=4,chat=6,translate=2"
+    LLM_ENDPOINT_CONCURRENCY: str = os.getenv("LLM_ENDPOINT_CONCURRENCY", "")
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))  # seconds
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+    LLM_CIRCUIT_FAILURES: int = int(os.getenv("LLM_CIRCUIT_FAILURES", "5"))
+    LLM_CIRCUIT_RESET_SECONDS: float = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+    # Daily token budgets per endpoint, e.g. "summarize=500000,chat=300000" (unset = unlimited)
+    LLM_DAILY_TOKEN_BUDGETS: str = os.getenv("LLM_DAILY_TOKEN_BUDGETS", "")
+    # USD per million tokens, used for cost accounting (gemini-2.5-flash list prices)
+    LLM_PRICE_INPUT_PER_M: float = float(os.getenv("LLM_PRICE_INPUT_PER_M", "0.30"))
+    LLM_PRICE_OUTPUT_PER_M: float = float(os.getenv("LLM_PRICE_OUTPUT_PER_M", "2.50"))
+    
     # YouTube API
     YOUTUBE_API_KEY: str = os.getenv("YOUTUBE_API_KEY", "")
     
@@ -21,6 +48,96 @@ class Settings:
     # NewsAPI.org
     NEWS_API_KEY: str = os.getenv("NEWS_API_KEY", "")
     
+    # Scraper domain health (negative caching of failing publishers)
+    DOMAIN_FAILURE_HALF_LIFE: float = float(os.getenv("DOMAIN_FAILURE_HALF_LIFE", "21600"))  # seconds
+    DOMAIN_FAILURE_THRESHOLD: float = float(os.getenv("DOMAIN_FAILURE_THRESHOLD", "3"))
+    
+    # Article content / summary caches
+    CACHE_DIR: str = os.getenv("CACHE_DIR", ".cache")
+    SCRAPE_CACHE_TTL: float = float(os.getenv("SCRAPE_CACHE_TTL", "21600"))  # seconds
+    SCRAPE_CACHE_MAX_ENTRIES: int = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "500"))
+    SUMMARY_CACHE_TTL: float = float(os.getenv("SUMMARY_CACHE_TTL", "86400"))  # seconds
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "2000"))
+    # Hot entries of each persistent cache kept in memory in front of SQLite
+    CACHE_MEMORY_ENTRIES: int = int(os.getenv("CACHE_MEMORY_ENTRIES", "256"))
+    
+    # Long articles are summarized map-reduce style in chunks of this size
+    SUMMARY_CHUNK_THRESHOLD: int = int(os.getenv("SUMMARY_CHUNK_THRESHOLD", "15000"))  # characters
+    SUMMARY_CHUNK_CHARS: int = int(os.getenv("SUMMARY_CHUNK_CHARS", "6000"))
+    SUMMARY_MAX_CHUNKS: int = int(os.getenv("SUMMARY_MAX_CHUNKS", "8"))
+    SUMMARY_MAX_CONCURRENCY: int = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+    
+    # Extractive pre-compression of prompt text
+    # 1.0: only text over SUMMARY_INPUT_TOKEN_BUDGET is compressed (see benchmark_compression.py)
+    EXTRACTIVE_KEEP_RATIO: float = float(os.getenv("EXTRACTIVE_KEEP_RATIO", "1.0"))
+    SUMMARY_INPUT_TOKEN_BUDGET: int = int(os.getenv("SUMMARY_INPUT_TOKEN_BUDGET", "8000"))
+    LOCAL_SUMMARY_TOKENS: int = int(os.getenv("LOCAL_SUMMARY_TOKENS", "180"))
+    CONTEXT_PASSAGE_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_PASSAGE_TOKEN_BUDGET", "200"))  # per article in chat context
+    
+    # Sentence-level translation memory
+    TRANSLATION_CACHE_TTL: float = float(os.getenv("TRANSLATION_CACHE_TTL", "2592000"))  # 30 days
+    TRANSLATION_CACHE_MAX_ENTRIES: int = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "100000"))
+    TRANSLATION_BATCH_CHARS: int = int(os.getenv("TRANSLATION_BATCH_CHARS", "6000"))
+    
+    # YouTube quota and video cache
+    YOUTUBE_DAILY_QUOTA: int = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+    YOUTUBE_QUOTA_RESERVE: int = int(os.getenv("YOUTUBE_QUOTA_RESERVE", "500"))
+    YOUTUBE_CACHE_TTL: int = int(os.getenv("YOUTUBE_CACHE_TTL", "1800"))  # 30 minutes
+    YOUTUBE_CACHE_MAX_STALE: int = int(os.getenv("YOUTUBE_CACHE_MAX_STALE", "604800"))  # 7 days
+    YOUTUBE_CACHE_MAX_ENTRIES: int = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "500"))
+    
+    # Chat
+    CHAT_SEARCH_TIMEOUT: float = float(os.getenv("CHAT_SEARCH_TIMEOUT", "3.0"))
+    CHAT_SESSION_MAX_STORED: int = int(os.getenv("CHAT_SESSION_MAX_STORED", "20000"))
+    CHAT_SESSION_TTL: int = int(os.getenv("CHAT_SESSION_TTL", "604800"))  # 7 days
+    CHAT_SESSION_RECENT_TURNS: int = int(os.getenv("CHAT_SESSION_RECENT_TURNS", "6"))
+    CHAT_SESSION_SUMMARIZE_BATCH: int = int(os.getenv("CHAT_SESSION_SUMMARIZE_BATCH", "4"))
+    CHAT_SESSION_SUMMARY_TOKENS: int = int(os.getenv("CHAT_SESSION_SUMMARY_TOKENS", "250"))
+    
+    # Local article corpus for chat retrieval
+    CORPUS_MAX_DOCUMENTS: int = int(os.getenv("CORPUS_MAX_DOCUMENTS", "5000"))
+    CORPUS_TTL: int = int(os.getenv("CORPUS_TTL", "259200"))  # 3 days
+    CORPUS_PASSAGE_TOKENS: int = int(os.getenv("CORPUS_PASSAGE_TOKENS", "150"))
+    CORPUS_TOP_K: int = int(os.getenv("CORPUS_TOP_K", "5"))
+    CORPUS_MIN_COVERAGE: float = float(os.getenv("CORPUS_MIN_COVERAGE", "0.6"))
+    CORPUS_MIN_PASSAGES: int = int(os.getenv("CORPUS_MIN_PASSAGES", "2"))
+    
+    # Daily digests
+    DIGEST_BUCKET_SECONDS: int = int(os.getenv("DIGEST_BUCKET_SECONDS", "3600"))
+    DIGEST_CACHE_MAX_ENTRIES: int = int(os.getenv("DIGEST_CACHE_MAX_ENTRIES", "1000"))
+    DIGEST_SEARCH_TIMEOUT: float = float(os.getenv("DIGEST_SEARCH_TIMEOUT", "10.0"))
+    DIGEST_AUDIO_ENABLED: bool = os.getenv("DIGEST_AUDIO_ENABLED", "true").lower() == "true"
+    # One extra LLM call per distinct category set to blend the per-category fragments
+    DIGEST_STITCH: bool = os.getenv("DIGEST_STITCH", "false").lower() == "true"
+    DIGEST_PREGENERATE_ENABLED: bool = os.getenv("DIGEST_PREGENERATE_ENABLED", "true").lower() == "true"
+    DIGEST_PREGENERATE_TOP_N: int = int(os.getenv("DIGEST_PREGENERATE_TOP_N", "5"))
+    # Always pre-generated, ';'-separated sets of ','-separated categories
+    DIGEST_PREGENERATE_COMBOS: str = os.getenv("DIGEST_PREGENERATE_COMBOS", "Technology,Business,Science")
+    
+    # Video transcripts
+    TRANSCRIPT_WORKERS: int = int(os.getenv("TRANSCRIPT_WORKERS", "2"))
+    TRANSCRIPT_CACHE_MAX_ENTRIES: int = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "5000"))
+    TRANSCRIPT_FIXTURE_DIR: str = os.getenv("TRANSCRIPT_FIXTURE_DIR", "")
+    
+    # Text-to-speech audio cache
+    AUDIO_CACHE_DIR: str = os.getenv("AUDIO_CACHE_DIR", os.path.join(CACHE_DIR, "audio"))
+    AUDIO_CACHE_MAX_BYTES: int = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+    TTS_CHUNK_CHARS: int = int(os.getenv("TTS_CHUNK_CHARS", "300"))
+    TTS_MAX_CONCURRENCY: int = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+    
+    # Batch summarization
+    BATCH_MAX_URLS: int = int(os.getenv("BATCH_MAX_URLS", "50"))
+    BATCH_SCRAPE_CONCURRENCY: int = int(os.getenv("BATCH_SCRAPE_CONCURRENCY", "8"))
+    BATCH_PER_HOST_LIMIT: int = int(os.getenv("BATCH_PER_HOST_LIMIT", "2"))
+    BATCH_PACK_SIZE: int = int(os.getenv("BATCH_PACK_SIZE", "4"))
+    BATCH_PACK_MAX_CHARS: int = int(os.getenv("BATCH_PACK_MAX_CHARS", "4000"))  # per article
+    
+    # Background prefetch of top feed/trend items
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_TOP_N: int = int(os.getenv("PREFETCH_TOP_N", "5"))
+    PREFETCH_SUMMARIZE: bool = os.getenv("PREFETCH_SUMMARIZE", "false").lower() == "true"
+    PREFETCH_QUEUE_SIZE: int = int(os.getenv("PREFETCH_QUEUE_SIZE", "50"))
+    
     # News Categories
     NEWS_CATEGORIES: list = [
         "Technology", "Business", "Science", "Health", "Entertainment",
@@ -1,6 +1,9 @@
-from typing import List
+import math
+import time
+from typing import Dict, List, Optional
 from app.models.schemas import NewsItem
-from urllib.parse import urlparse
+from app.core.config import settings
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
 # List of domains that are known to be paywalled, block scrapers, 
 # or are video platforms not suitable for article summarization.
@@ -34,24 +37,204 @@ BLOCKED_DOMAINS = {
     "twitch.tv"
 }
 
+# Second-level public suffixes: registrations happen one label below these,
+# so they must never be treated as a site of their own
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "me.uk",
+    "com.au", "net.au", "org.au", "gov.au",
+    "co.in", "net.in", "org.in", "gov.in", "nic.in",
+    "co.jp", "ne.jp", "or.jp",
+    "com.br", "com.cn", "com.mx", "com.sg", "com.hk", "com.tr", "com.pk",
+    "co.nz", "co.za", "co.kr", "co.il",
+}
+
+
+def domain_suffixes(domain: str) -> List[str]:
+    """
+    Return the domain and every parent suffix, most specific first.
+    e.g. "edition.cnn.com" -> ["edition.cnn.com", "cnn.com"]
+    Bare TLDs and public suffixes such as "co.uk" are never returned, so
+    "news.bbc.co.uk" -> ["news.bbc.co.uk", "bbc.co.uk"].
+    """
+    domain = domain.lower().split(":")[0].strip(".")
+    if domain.startswith("www."):
+        domain = domain[4:]
+    parts = domain.split(".")
+    suffixes = [
+        ".".join(parts[i:]) for i in range(len(parts) - 1)
+        if ".".join(parts[i:]) not in MULTI_LABEL_SUFFIXES
+    ]
+    return suffixes or [domain]
+
+
+def get_domain(url: str) -> str:
+    """Extract the normalized host (no www., no port) from a URL."""
+    suffixes = domain_suffixes(urlparse(url).netloc)
+    return suffixes[0] if suffixes else ""
+
+
+# Query parameters that only carry tracking info and never change the article
+TRACKING_PARAMS = {"fbclid", "gclid", "ocid", "cmpid", "ref", "ref_src", "smid", "mc_cid", "mc_eid"}
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize an article URL for use as a cache key: lowercase scheme and host,
+    drop "www.", fragments, tracking parameters and trailing slashes, and sort
+    the remaining query parameters.
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunparse((
+        parsed.scheme.lower() or "https",
+        host,
+        parsed.path.rstrip("/") or "/",
+        "",
+        urlencode(query),
+        ""
+    ))
+
+
+class DomainHealth:
+    """
+    Per-domain scrape statistics recorded by the scraper.
+
+    Failures and successes are kept as exponentially decaying scores, so a
+    domain that failed yesterday but works today recovers automatically.
+    A domain is negatively cached once its decayed failure score crosses the
+    threshold and it fails far more often than it succeeds.
+    """
+
+    def __init__(
+        self,
+        half_life: float = settings.DOMAIN_FAILURE_HALF_LIFE,
+        failure_threshold: float = settings.DOMAIN_FAILURE_THRESHOLD,
+        max_domains: int = 5000
+    ):
+        self.half_life = half_life
+        self.failure_threshold = failure_threshold
+        self.max_domains = max_domains
+        self._stats: Dict[str, dict] = {}
+
+    def _decay(self, entry: dict, now: float) -> None:
+        elapsed = now - entry["updated_at"]
+        if elapsed > 0:
+            factor = math.pow(0.5, elapsed / self.half_life)
+            entry["failure_score"] *= factor
+            entry["success_score"] *= factor
+            entry["updated_at"] = now
+
+    def _entry(self, domain: str, now: float) -> dict:
+        entry = self._stats.get(domain)
+        if entry is None:
+            if len(self._stats) >= self.max_domains:
+                # Drop the least recently touched domain
+                oldest = min(self._stats, key=lambda d: self._stats[d]["updated_at"])
+                del self._stats[oldest]
+            entry = {
+                "successes": 0,
+                "failures": 0,
+                "failure_score": 0.0,
+                "success_score": 0.0,
+                "avg_latency_ms": 0.0,
+                "last_failure_reason": None,
+                "updated_at": now
+            }
+            self._stats[domain] = entry
+        else:
+            self._decay(entry, now)
+        return entry
+
+    def record_success(self, url: str, latency_ms: float) -> None:
+        """Record a successful fetch + extraction for the URL's domain."""
+        domain = get_domain(url)
+        if not domain:
+            return
+        entry = self._entry(domain, time.time())
+        entry["successes"] += 1
+        entry["success_score"] += 1.0
+        # Exponential moving average keeps latency cheap to maintain
+        if entry["avg_latency_ms"]:
+            entry["avg_latency_ms"] = 0.8 * entry["avg_latency_ms"] + 0.2 * latency_ms
+        else:
+            entry["avg_latency_ms"] = latency_ms
+
+    def record_failure(self, url: str, reason: str, latency_ms: Optional[float] = None) -> None:
+        """
+        Record a failed fetch for the URL's domain.
+
+        Args:
+            url: Article URL that failed
+            reason: Short failure label (e.g. "http_403", "cache_fallback", "too_short")
+            latency_ms: Time spent before giving up, if known
+        """
+        domain = get_domain(url)
+        if not domain:
+            return
+        entry = self._entry(domain, time.time())
+        entry["failures"] += 1
+        entry["failure_score"] += 1.0
+        entry["last_failure_reason"] = reason
+        if latency_ms is not None and not entry["avg_latency_ms"]:
+            entry["avg_latency_ms"] = latency_ms
+
+    def is_blocked(self, url: str) -> bool:
+        """True if the URL's domain (or any parent domain) is negatively cached."""
+        now = time.time()
+        for suffix in domain_suffixes(urlparse(url).netloc):
+            entry = self._stats.get(suffix)
+            if entry is None:
+                continue
+            self._decay(entry, now)
+            if (
+                entry["failure_score"] >= self.failure_threshold
+                and entry["failure_score"] > 3 * entry["success_score"]
+            ):
+                return True
+        return False
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Snapshot of per-domain statistics with current decayed scores."""
+        now = time.time()
+        snapshot = {}
+        for domain, entry in self._stats.items():
+            self._decay(entry, now)
+            snapshot[domain] = {
+                **{k: v for k, v in entry.items() if k != "updated_at"},
+                "failure_score": round(entry["failure_score"], 3),
+                "success_score": round(entry["success_score"], 3),
+                "avg_latency_ms": round(entry["avg_latency_ms"], 1),
+                "blocked": self.is_blocked(f"https://{domain}")
+            }
+        return snapshot
+
+
+# Singleton instance shared by the scraper and the feed filters
+domain_health = DomainHealth()
+
+
 def is_domain_accessible(url: str) -> bool:
     """Check if a URL is from an accessible domain."""
     try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
-        
-        # Remove 'www.' prefix for simpler matching if desired, 
-        # but exact matching against set is faster if we include strict variants.
-        # Let's clean the domain to be safe.
-        if domain.startswith("www."):
-            root_domain = domain[4:]
-        else:
-            root_domain = domain
-            
-        # Check explicit blacklists
-        if domain in BLOCKED_DOMAINS or root_domain in BLOCKED_DOMAINS:
+        suffixes = domain_suffixes(urlparse(url).netloc)
+        if not suffixes or not suffixes[0]:
+            return False
+
+        # Check explicit blacklists, including parent domains so
+        # subdomains like "markets.wsj.com" are covered too
+        if any(suffix in BLOCKED_DOMAINS for suffix in suffixes):
+            return False
+
+        # Check domains learned from scrape outcomes
+        if domain_health.is_blocked(url):
             return False
-            
+
         return True
     except:
         return False
@@ -0,0 +1,181 @@
+"""
+In-process ledger of LLM usage per endpoint: calls, tokens, latency, cost,
+cache effectiveness and daily token budgets.
+"""
+import bisect
+from collections import deque
+from datetime import date
+from typing import Dict, Optional
+from app.core.config import settings, parse_key_values
+
+# Latency histogram bucket upper bounds, in seconds (Prometheus style)
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return max(1, len(text) // 4)
+
+
+def _new_entry() -> dict:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "latency_sum": 0.0,
+        "latency_buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+        "recent_latencies": deque(maxlen=1000),
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "degraded": 0
+    }
+
+
+class LLMLedger:
+    """Records every LLM call and enforces per-endpoint daily token budgets."""
+
+    def __init__(self):
+        self._entries: Dict[str, dict] = {}
+        self._daily_tokens: Dict[str, int] = {}
+        self._day = date.today()
+        self.budgets = {
+            endpoint: int(value)
+            for endpoint, value in parse_key_values(settings.LLM_DAILY_TOKEN_BUDGETS).items()
+        }
+
+    def _entry(self, endpoint: str) -> dict:
+        entry = self._entries.get(endpoint)
+        if entry is None:
+            entry = self._entries[endpoint] = _new_entry()
+        return entry
+
+    def _roll_day(self) -> None:
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._daily_tokens = {}
+
+    def record_call(
+        self,
+        endpoint: str,
+        latency: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: bool = False
+    ) -> None:
+        """Record one LLM call (latency in seconds)."""
+        self._roll_day()
+        entry = self._entry(endpoint)
+        entry["calls"] += 1
+        entry["errors"] += int(error)
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["latency_sum"] += latency
+        entry["latency_buckets"][bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        entry["recent_latencies"].append(latency)
+        self._daily_tokens[endpoint] = self._daily_tokens.get(endpoint, 0) + prompt_tokens + completion_tokens
+
+    def record_cache(self, endpoint: str, hit: bool) -> None:
+        entry = self._entry(endpoint)
+        entry["cache_hits" if hit else "cache_misses"] += 1
+
+    def record_degraded(self, endpoint: str) -> None:
+        """Record a response served without the LLM because of the budget or an outage."""
+        self._entry(endpoint)["degraded"] += 1
+
+    def tokens_today(self, endpoint: str) -> int:
+        self._roll_day()
+        return self._daily_tokens.get(endpoint, 0)
+
+    def is_over_budget(self, endpoint: str) -> bool:
+        """True if the endpoint has used up today's token budget."""
+        budget = self.budgets.get(endpoint)
+        return budget is not None and self.tokens_today(endpoint) >= budget
+
+    def budget_remaining(self, endpoint: str) -> Optional[int]:
+        budget = self.budgets.get(endpoint)
+        if budget is None:
+            return None
+        return max(0, budget - self.tokens_today(endpoint))
+
+    @staticmethod
+    def _cost(prompt_tokens: int, completion_tokens: int) -> float:
+        return (
+            prompt_tokens * settings.LLM_PRICE_INPUT_PER_M
+            + completion_tokens * settings.LLM_PRICE_OUTPUT_PER_M
+        ) / 1_000_000
+
+    def snapshot(self) -> dict:
+        """JSON-friendly summary per endpoint."""
+        endpoints = {}
+        for endpoint, entry in self._entries.items():
+            latencies = sorted(entry["recent_latencies"])
+
+            def percentile(p: float) -> float:
+                if not latencies:
+                    return 0.0
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+            lookups = entry["cache_hits"] + entry["cache_misses"]
+            endpoints[endpoint] = {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "prompt_tokens": entry["prompt_tokens"],
+                "completion_tokens": entry["completion_tokens"],
+                "cost_usd": round(self._cost(entry["prompt_tokens"], entry["completion_tokens"]), 4),
+                "latency_ms": {
+                    "avg": round(entry["latency_sum"] / entry["calls"] * 1000, 1) if entry["calls"] else 0.0,
+                    "p50": percentile(0.5),
+                    "p95": percentile(0.95),
+                    "p99": percentile(0.99)
+                },
+                "cache_hits": entry["cache_hits"],
+                "cache_misses": entry["cache_misses"],
+                "cache_hit_rate": round(entry["cache_hits"] / lookups, 3) if lookups else 0.0,
+                "degraded": entry["degraded"],
+                "tokens_today": self.tokens_today(endpoint),
+                "daily_budget": self.budgets.get(endpoint),
+                "budget_remaining": self.budget_remaining(endpoint)
+            }
+        return endpoints
+
+    def prometheus(self) -> str:
+        """Render the ledger in the Prometheus text exposition format."""
+        lines = [
+            "# HELP newsflow_llm_calls_total LLM calls per endpoint",
+            "# TYPE newsflow_llm_calls_total counter",
+        ]
+        for endpoint, entry in self._entries.items():
+            lines.append(f'newsflow_llm_calls_total{{endpoint="{endpoint}"}} {entry["calls"]}')
+        lines += ["# HELP newsflow_llm_errors_total Failed LLM calls per endpoint",
+                  "# TYPE newsflow_llm_errors_total counter"]
+        for endpoint, entry in self._entries.items():
+            lines.append(f'newsflow_llm_errors_total{{endpoint="{endpoint}"}} {entry["errors"]}')
+        lines += ["# HELP newsflow_llm_tokens_total LLM tokens per endpoint and kind",
+                  "# TYPE newsflow_llm_tokens_total counter"]
+        for endpoint, entry in self._entries.items():
+            for kind in ("prompt", "completion"):
+                lines.append(
+                    f'newsflow_llm_tokens_total{{endpoint="{endpoint}",kind="{kind}"}} {entry[kind + "_tokens"]}'
+                )
+        lines += ["# HELP newsflow_llm_cache_lookups_total Cache lookups in front of the LLM",
+                  "# TYPE newsflow_llm_cache_lookups_total counter"]
+        for endpoint, entry in self._entries.items():
+            lines.append(f'newsflow_llm_cache_lookups_total{{endpoint="{endpoint}",result="hit"}} {entry["cache_hits"]}')
+            lines.append(f'newsflow_llm_cache_lookups_total{{endpoint="{endpoint}",result="miss"}} {entry["cache_misses"]}')
+        lines += ["# HELP newsflow_llm_latency_seconds LLM call latency",
+                  "# TYPE newsflow_llm_latency_seconds histogram"]
+        for endpoint, entry in self._entries.items():
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, entry["latency_buckets"]):
+                cumulative += count
+                lines.append(f'newsflow_llm_latency_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+            lines.append(f'newsflow_llm_latency_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {entry["calls"]}')
+            lines.append(f'newsflow_llm_latency_seconds_sum{{endpoint="{endpoint}"}} {round(entry["latency_sum"], 3)}')
+            lines.append(f'newsflow_llm_latency_seconds_count{{endpoint="{endpoint}"}} {entry["calls"]}')
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+llm_ledger = LLMLedger()
@@ -0,0 +1,394 @@
+"""
+Process-wide Gemini client manager.
+
+Hands out one reusable ChatGoogleGenerativeAI client per configuration and
+routes every call through a global and a per-endpoint concurrency limit,
+jittered exponential retries on 429/5xx, and a circuit breaker that fails
+fast while Gemini is down.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Optional, Tuple
+from langchain_google_genai import ChatGoogleGenerativeAI
+from app.core.config import settings, parse_key_values
+from app.core.ledger import llm_ledger, estimate_tokens
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    _RETRYABLE_TYPES: Tuple[type, ...] = (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.InternalServerError,
+        google_exceptions.BadGateway,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.GatewayTimeout,
+        google_exceptions.DeadlineExceeded,
+    )
+except ImportError:  # google-api-core comes with langchain-google-genai
+    _RETRYABLE_TYPES = ()
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# For errors that only carry a message: google-api-core messages start with
+# the HTTP status ("503 The model is overloaded"), gRPC ones name the status
+_STATUS_PREFIX = re.compile(r'^\s*(\d{3})\b')
+_RETRYABLE_STATUS_NAMES = (
+    "resource_exhausted", "resource exhausted", "rate limit",
+    "unavailable", "internal error", "deadline_exceeded", "deadline exceeded"
+)
+
+# Daily quotas don't come back until tomorrow, so retrying only burns time
+_DAILY_QUOTA = re.compile(r'per\s*day|daily', re.IGNORECASE)
+
+class LLMUnavailableError(Exception):
+    """Raised when no Gemini API key is configured."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised instead of calling Gemini while the circuit breaker is open."""
+
+
+class BudgetExceededError(LLMUnavailableError):
+    """Raised instead of calling Gemini once an endpoint's daily token budget is spent."""
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    for attr in ("code", "status_code"):
+        code = getattr(exc, attr, None)
+        code = getattr(code, "value", code)  # grpc StatusCode enums
+        if isinstance(code, int):
+            return code
+    match = _STATUS_PREFIX.match(str(exc))
+    return int(match.group(1)) if match else None
+
+
+def is_daily_quota_error(exc: Exception) -> bool:
+    return _status_code(exc) == 429 and bool(_DAILY_QUOTA.search(str(exc)))
+
+
+def seconds_until_quota_reset() -> float:
+    """Gemini's daily quotas reset at midnight Pacific time."""
+    try:
+        from zoneinfo import ZoneInfo
+        pacific = ZoneInfo("America/Los_Angeles")
+    except Exception:  # No tz database (e.g. Windows without tzdata)
+        pacific = timezone(timedelta(hours=-8))
+    now = datetime.now(pacific)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+def is_retryable_error(exc: Exception) -> bool:
+    """
+    True for rate-limit (429), server-side (5xx) and timeout failures,
+    except exhausted daily quotas.
+    """
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if is_daily_quota_error(exc):
+        return False
+    if _RETRYABLE_TYPES and isinstance(exc, _RETRYABLE_TYPES):
+        return True
+    code = _status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    message = str(exc).lower()
+    return any(name in message for name in _RETRYABLE_STATUS_NAMES)
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """True if the error means Gemini is overloaded or we are over quota."""
+    if isinstance(exc, (CircuitOpenError, BudgetExceededError)):
+        return True
+    if _status_code(exc) == 429:
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in ("quota", "rate limit", "resource exhausted", "resource_exhausted"))
+
+
+def parse_json_response(text: str):
+    """Parse a JSON LLM response, tolerating Markdown code fences around it."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r'^```[a-zA-Z]*\s*|\s*```$', '', text)
+    return json.loads(text)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. After that a single trial call is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.held_until: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.held_until is not None and time.monotonic() < self.held_until:
+            return "open"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        # A trial that never reported back (e.g. cancelled) expires after a timeout
+        if state == "half_open" and (
+            self._trial_started_at is None or now - self._trial_started_at >= self.reset_timeout
+        ):
+            self._trial_started_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.held_until = None
+        self._trial_started_at = None
+
+    def hold_open(self, seconds: float) -> None:
+        """Open the circuit for a known period, e.g. until a daily quota resets."""
+        now = time.monotonic()
+        self.opened_at = now
+        self.held_until = now + seconds
+        self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_started_at = None
+        if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class LLMManager:
+    """Shared entry point for every Gemini call in the app."""
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, float], ChatGoogleGenerativeAI] = {}
+        self._global_limit = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self._endpoint_limits: Dict[str, asyncio.Semaphore] = {}
+        self._endpoint_concurrency = parse_key_values(settings.LLM_ENDPOINT_CONCURRENCY)
+        self.circuit = CircuitBreaker(
+            failure_threshold=settings.LLM_CIRCUIT_FAILURES,
+            reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS
+        )
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    def is_configured(self) -> bool:
+        return bool(settings.GOOGLE_API_KEY)
+
+    def is_available(self, endpoint: Optional[str] = None) -> bool:
+        """
+        True if a call would currently be attempted: key set, circuit not open
+        and, when an endpoint is given, its daily token budget not yet spent.
+        """
+        if endpoint and llm_ledger.is_over_budget(endpoint):
+            return False
+        return self.is_configured() and self.circuit.state != "open"
+
+    def get_client(self, temperature: float = 0.3, model: str = DEFAULT_MODEL) -> Optional[ChatGoogleGenerativeAI]:
+        """Get the shared client for a model/temperature, creating it on first use."""
+        if not self.is_configured():
+            return None
+        key = (model, temperature)
+        client = self._clients.get(key)
+        if client is None:
+            client = ChatGoogleGenerativeAI(
+                model=model,
+                google_api_key=settings.GOOGLE_API_KEY,
+                temperature=temperature,
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+                # Retries are handled here so they respect the circuit breaker
+                max_retries=1
+            )
+            self._clients[key] = client
+        return client
+
+    def _endpoint_limit(self, endpoint: str) -> asyncio.Semaphore:
+        limit = self._endpoint_limits.get(endpoint)
+        if limit is None:
+            size = int(self._endpoint_concurrency.get(endpoint, settings.LLM_DEFAULT_ENDPOINT_CONCURRENCY))
+            limit = asyncio.Semaphore(size)
+            self._endpoint_limits[endpoint] = limit
+        return limit
+
+    def _client_or_raise(self, endpoint: str, temperature: float, model: str) -> ChatGoogleGenerativeAI:
+        client = self.get_client(temperature, model)
+        if client is None:
+            raise LLMUnavailableError("LLM service not available. Please configure GOOGLE_API_KEY.")
+        if llm_ledger.is_over_budget(endpoint):
+            raise BudgetExceededError(
+                f"Daily AI budget for {endpoint} has been reached. Please try again tomorrow."
+            )
+        if not self.circuit.allow():
+            self.stats["rejected"] += 1
+            raise CircuitOpenError("LLM service is temporarily unavailable. Please try again shortly.")
+        return client
+
+    async def _backoff(self, attempt: int) -> None:
+        # Full jitter keeps many waiting requests from retrying in lockstep
+        delay = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** attempt))
+        self.stats["retries"] += 1
+        await asyncio.sleep(random.uniform(0, delay))
+
+    async def ainvoke(
+        self,
+        messages: list,
+        endpoint: str = "default",
+        temperature: float = 0.3,
+        model: str = DEFAULT_MODEL
+    ):
+        """
+        Invoke Gemini with concurrency limits, retries and circuit breaking.
+
+        Raises:
+            LLMUnavailableError: If no API key is configured
+            CircuitOpenError: If Gemini has been failing and the circuit is open
+            BudgetExceededError: If the endpoint's daily token budget is spent
+            Exception: The last error once retries are exhausted
+        """
+        attempt = 0
+        while True:
+            client = self._client_or_raise(endpoint, temperature, model)
+            try:
+                async with self._global_limit, self._endpoint_limit(endpoint):
+                    self.stats["calls"] += 1
+                    with self._metered(endpoint, messages) as meter:
+                        response = await client.ainvoke(messages)
+                        meter.add(response)
+                self.circuit.record_success()
+                return response
+            except Exception as e:
+                if not self._record_error(e):
+                    self.stats["failures"] += 1
+                    raise
+                if attempt >= settings.LLM_MAX_RETRIES:
+                    self.stats["failures"] += 1
+                    raise
+                await self._backoff(attempt)
+                attempt += 1
+
+    def _record_error(self, exc: Exception) -> bool:
+        """Update the circuit breaker for a failed call; returns whether to retry."""
+        if is_daily_quota_error(exc):
+            # Every call fails until the quota resets, so fail fast (and degrade) until then
+            self.circuit.hold_open(seconds_until_quota_reset())
+            print(f"Gemini daily quota exhausted, circuit held open: {exc}")
+            return False
+        if not is_retryable_error(exc):
+            # The request itself was bad; Gemini is fine
+            self.circuit.record_success()
+            return False
+        self.circuit.record_failure()
+        return True
+
+    async def astream(
+        self,
+        messages: list,
+        endpoint: str = "default",
+        temperature: float = 0.3,
+        model: str = DEFAULT_MODEL
+    ) -> AsyncIterator:
+        """
+        Stream Gemini output chunks. Retries only happen before the first chunk
+        arrives; once tokens have been yielded an error is raised to the caller.
+        """
+        attempt = 0
+        while True:
+            client = self._client_or_raise(endpoint, temperature, model)
+            started = False
+            try:
+                async with self._global_limit, self._endpoint_limit(endpoint):
+                    self.stats["calls"] += 1
+                    with self._metered(endpoint, messages) as meter:
+                        async for chunk in client.astream(messages):
+                            started = True
+                            meter.add(chunk)
+                            yield chunk
+                self.circuit.record_success()
+                return
+            except Exception as e:
+                if not self._record_error(e):
+                    self.stats["failures"] += 1
+                    raise
+                if started or attempt >= settings.LLM_MAX_RETRIES:
+                    self.stats["failures"] += 1
+                    raise
+                await self._backoff(attempt)
+                attempt += 1
+
+    @contextmanager
+    def _metered(self, endpoint: str, messages: list):
+        """Record latency and token usage of one call in the ledger, even if it fails."""
+        meter = _UsageMeter()
+        started = time.perf_counter()
+        error = False
+        try:
+            yield meter
+        except BaseException:
+            error = True
+            raise
+        finally:
+            prompt_tokens, completion_tokens = meter.totals(messages)
+            llm_ledger.record_call(
+                endpoint,
+                time.perf_counter() - started,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                error=error
+            )
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "circuit": self.circuit.state,
+            "clients": len(self._clients)
+        }
+
+
+class _UsageMeter:
+    """Accumulates token usage from a response or a sequence of stream chunks."""
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.output_chars = 0
+
+    def add(self, message) -> None:
+        usage = getattr(message, "usage_metadata", None) or {}
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.output_tokens += usage.get("output_tokens", 0)
+        content = getattr(message, "content", "")
+        if isinstance(content, str):
+            self.output_chars += len(content)
+
+    def totals(self, messages: list) -> Tuple[int, int]:
+        """(prompt, completion) tokens, estimated from text when usage isn't reported."""
+        prompt_tokens = self.input_tokens or sum(
+            estimate_tokens(m.content) for m in messages if isinstance(getattr(m, "content", None), str)
+        )
+        completion_tokens = self.output_tokens or (self.output_chars // 4)
+        return prompt_tokens, completion_tokens
+
+
+# Singleton instance
+llm_manager = LLMManager()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 
 class NewsItem(BaseModel):
@@ -41,11 +41,13 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None  # server-side history; preferred over sending history
     history: Optional[List[ChatMessage]] = None
 
 class ChatResponse(BaseModel):
     response: str
     sources: Optional[List[str]] = None
+    session_id: Optional[str] = None
 
 class DigestRequest(BaseModel):
     categories: Optional[List[str]] = None
@@ -54,14 +56,22 @@ class DigestResponse(BaseModel):
     digest: str
     headlines: List[str]
     generated_at: str
+    cached: bool = False
+    audio_url: Optional[str] = None  # pre-rendered spoken briefing, once ready
 
 class SummarizeRequest(BaseModel):
     url: str
+    mode: Literal["auto", "fast"] = "auto"  # 'auto' (Gemini, local fallback) or 'fast' (local only)
+
+class BatchSummarizeRequest(BaseModel):
+    urls: List[str]
 
 class SummarizeResponse(BaseModel):
     summary: str
     title: Optional[str] = None
     original_text: Optional[str] = None
+    engine: Optional[str] = None  # 'gemini' or 'extractive'
+    cached: Optional[bool] = None
 
 class TranslateRequest(BaseModel):
     text: str
@@ -71,6 +81,15 @@ class TranslateResponse(BaseModel):
     translated_text: str
     source_language: Optional[str] = None
 
+class FeedTranslateRequest(BaseModel):
+    items: List[NewsItem]
+    target_language: str # 'hi' or 'en'
+
+class FeedTranslateResponse(BaseModel):
+    success: bool
+    items: List[NewsItem]
+    target_language: str
+
 class TTSRequest(BaseModel):
     text: str
     language: str # 'hi' or 'en'
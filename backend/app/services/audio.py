@@ -1,11 +1,116 @@
 from gtts import gTTS
 import os
 import uuid
+import hashlib
 from io import BytesIO
+import re
 import asyncio
+from typing import AsyncIterator, List, Optional
 from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+
+_executor = ThreadPoolExecutor(max_workers=max(3, settings.TTS_MAX_CONCURRENCY))
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?।])\s+')
+
+
+class AudioCache:
+    """
+    On-disk MP3 cache keyed by (text hash, language).
+
+    Files are evicted least-recently-used first (by mtime, refreshed on every
+    hit) once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(text: str, lang: str) -> str:
+        digest = hashlib.sha256(text.strip().encode("utf-8")).hexdigest()[:32]
+        return f"{lang}_{digest}"
+
+    @staticmethod
+    def is_valid_key(key: str) -> bool:
+        lang, _, digest = key.partition("_")
+        return lang.isalpha() and len(digest) == 32 and all(c in "0123456789abcdef" for c in digest)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached file, or None. Refreshes the file's LRU position."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        """Atomically store audio bytes and evict old files if over budget."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        try:
+            # Re-rendering an existing clip replaces it rather than adding to the total
+            old_size = os.path.getsize(path)
+        except FileNotFoundError:
+            old_size = 0
+        os.replace(tmp_path, path)
+        if self._total_bytes is not None:
+            self._total_bytes += len(data) - old_size
+        self._evict()
+        return path
+
+    def _scan(self) -> list:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+            return
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        if self._total_bytes is None and os.path.isdir(self.directory):
+            self._total_bytes = sum(size for _, size, _ in self._scan())
+        return {
+            "bytes": self._total_bytes or 0,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+# Singleton instance
+audio_cache = AudioCache(settings.AUDIO_CACHE_DIR, settings.AUDIO_CACHE_MAX_BYTES)
 
-_executor = ThreadPoolExecutor(max_workers=3)
 
 def _generate_audio(text: str, lang: str) -> BytesIO:
     tts = gTTS(text=text, lang=lang, slow=False)
@@ -14,14 +119,109 @@ def _generate_audio(text: str, lang: str) -> BytesIO:
     fp.seek(0)
     return fp
 
-async def text_to_speech(text: str, lang: str = 'en') -> BytesIO:
+async def synthesize_speech(text: str, lang: str = 'en') -> Optional[str]:
     """
-    Converts text to speech and returns the audio as a BytesIO object asynchronously.
+    Synthesizes the text and caches the MP3, returning its path. For callers
+    that have already missed the cache, so the lookup isn't counted twice.
     """
     try:
         loop = asyncio.get_running_loop()
         fp = await loop.run_in_executor(_executor, _generate_audio, text, lang)
-        return fp
+        return await loop.run_in_executor(
+            _executor, audio_cache.put, audio_cache.make_key(text, lang), fp.getvalue()
+        )
     except Exception as e:
         print(f"Error generating speech: {e}")
         return None
+
+async def get_speech_file(text: str, lang: str = 'en') -> Optional[str]:
+    """
+    Returns the path of an MP3 for the text, synthesizing and caching it on a miss.
+    """
+    path = audio_cache.get(audio_cache.make_key(text, lang))
+    return path or await synthesize_speech(text, lang)
+
+def split_speech_chunks(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Splits text into sentence-aligned chunks for incremental synthesis.
+    The first sentence is kept on its own so playback can start quickly.
+    """
+    max_chars = max_chars or settings.TTS_CHUNK_CHARS
+    sentences = [s.strip() for s in _SENTENCE_BOUNDARY.split(text.strip()) if s.strip()]
+    if not sentences:
+        return []
+
+    chunks = [sentences[0]]
+    current = ""
+    for sentence in sentences[1:]:
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def stream_speech(text: str, lang: str = 'en') -> AsyncIterator[bytes]:
+    """
+    Synthesizes sentence chunks concurrently and yields their MP3 bytes in order.
+    Each chunk is cached on its own; the assembled clip is cached under the
+    full text's key once every chunk has been produced.
+    """
+    chunks = split_speech_chunks(text)
+    semaphore = asyncio.Semaphore(settings.TTS_MAX_CONCURRENCY)
+
+    async def synthesize(chunk: str) -> Optional[str]:
+        async with semaphore:
+            return await get_speech_file(chunk, lang)
+
+    tasks = [asyncio.create_task(synthesize(chunk)) for chunk in chunks]
+    parts = []
+    try:
+        for task in tasks:
+            path = await task
+            if not path:
+                print("Speech chunk failed, stopping stream")
+                return
+            with open(path, "rb") as f:
+                data = f.read()
+            parts.append(data)
+            yield data
+
+        # MP3 frames concatenate cleanly, so the joined chunks form the full clip
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            _executor, audio_cache.put, audio_cache.make_key(text, lang), b"".join(parts)
+        )
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+async def render_speech(text: str, lang: str = 'en') -> Optional[str]:
+    """
+    Synthesizes (or finds) the full clip for the text and returns its path.
+    Long texts go through the chunked pipeline so chunks render concurrently.
+    """
+    key = audio_cache.make_key(text, lang)
+    path = audio_cache.get(key)
+    if path:
+        return path
+    if len(split_speech_chunks(text)) <= 1:
+        return await synthesize_speech(text, lang)
+    async for _ in stream_speech(text, lang):
+        pass
+    # stream_speech stored the assembled clip; this isn't another cache lookup
+    path = audio_cache.path_for(key)
+    return path if os.path.exists(path) else None
+
+async def text_to_speech(text: str, lang: str = 'en') -> BytesIO:
+    """
+    Converts text to speech and returns the audio as a BytesIO object asynchronously.
+    """
+    path = await get_speech_file(text, lang)
+    if not path:
+        return None
+    with open(path, "rb") as f:
+        return BytesIO(f.read())
@@ -0,0 +1,178 @@
+"""
+Server-side chat sessions for /chat and /chat/stream.
+
+Each session keeps the last few turns verbatim plus a rolling summary of
+everything older, so the prompt stays the same size however long the
+conversation runs. Sessions live only in the persistent cache and are
+re-read on every request, so they survive restarts and stay consistent when
+requests for one session land on different workers.
+"""
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional, Set
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.core.cache import PersistentCache
+from app.core.config import settings
+from app.core.llm import llm_manager
+from app.services.extractive import extractive_summary
+
+MEMORY_SYSTEM_PROMPT = """You maintain the memory of a conversation between a user and a news assistant.
+Merge the new turns into the existing summary. Keep topics, named entities, facts the assistant stated and the user's stated interests or preferences.
+Drop greetings and filler. Reply with the updated summary only, as short plain prose."""
+
+
+def _format_turns(turns: List[dict]) -> str:
+    return "\n".join(f"{t['role'].capitalize()}: {t['content']}" for t in turns)
+
+
+class ChatSessionStore:
+    """
+    Sessions backed by a PersistentCache shared by all workers.
+
+    Turns are appended with an atomic update of the stored session, so
+    concurrent requests never drop each other's exchanges. Once a session holds more than recent_turns + summarize_batch turns, the
+    oldest ones are folded into its summary by a background task. The fold
+    uses Gemini when available and the local extractive summarizer otherwise.
+    """
+
+    def __init__(
+        self,
+        recent_turns: int = settings.CHAT_SESSION_RECENT_TURNS,
+        summarize_batch: int = settings.CHAT_SESSION_SUMMARIZE_BATCH
+    ):
+        self.recent_turns = recent_turns
+        self.summarize_batch = summarize_batch
+        # No memory layer: other workers update the same sessions
+        self._store = PersistentCache(
+            "chat_sessions",
+            max_entries=settings.CHAT_SESSION_MAX_STORED,
+            ttl=settings.CHAT_SESSION_TTL,
+            memory_entries=0
+        )
+        self._compacting: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"created": 0, "compactions": 0, "local_compactions": 0}
+
+    async def _save(self, session: dict) -> None:
+        session["updated_at"] = time.time()
+        await self._store.aset(session["id"], session)
+
+    async def get_or_create(self, session_id: Optional[str] = None, history: Optional[List[dict]] = None) -> dict:
+        """
+        Load the latest stored copy of a session, or start a new one (seeded
+        with a client-side history for clients that still send it).
+        """
+        if session_id:
+            session = await self._store.aget(session_id)
+            if session is not None:
+                return session
+
+        session = {
+            # Unknown or expired IDs get a fresh one rather than trusting the client's
+            "id": uuid.uuid4().hex,
+            "summary": "",
+            "turns": [
+                {"role": m["role"], "content": m["content"]}
+                for m in (history or []) if m.get("content")
+            ],
+            "updated_at": time.time()
+        }
+        self.stats["created"] += 1
+        await self._save(session)
+        self._schedule_compaction(session)
+        return session
+
+    def recent_history(self, session: dict) -> List[dict]:
+        """
+        Every turn not yet folded into the summary. Compaction keeps this at
+        recent_turns to recent_turns + summarize_batch turns, so nothing falls
+        between the verbatim turns and the summary.
+        """
+        return list(session["turns"])
+
+    async def record_exchange(self, session: dict, message: str, response: str) -> None:
+        """Append a user/assistant exchange and compact the session if it grew too long."""
+        exchange = [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": response}
+        ]
+
+        def append(stored: Optional[dict]) -> dict:
+            # Another worker may have added turns or compacted since we loaded it
+            latest = stored or session
+            latest["turns"] = latest["turns"] + exchange
+            latest["updated_at"] = time.time()
+            return latest
+
+        session.update(await self._store.aupdate(session["id"], append))
+        self._schedule_compaction(session)
+
+    def _schedule_compaction(self, session: dict) -> None:
+        if len(session["turns"]) <= self.recent_turns + self.summarize_batch:
+            return
+        if session["id"] in self._compacting:
+            return
+        self._compacting.add(session["id"])
+        task = asyncio.create_task(self._compact(session["id"]))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compact(self, session_id: str) -> None:
+        try:
+            session = await self._store.aget(session_id)
+            if session is None or len(session["turns"]) <= self.recent_turns + self.summarize_batch:
+                return
+            older = session["turns"][:-self.recent_turns]
+            summary = await self._fold(session["summary"], older)
+
+            def trim(stored: Optional[dict]) -> Optional[dict]:
+                # Turns may have been appended while we were summarizing; only drop
+                # the ones that went into the summary, and skip the write if
+                # another worker compacted them first
+                if stored is None or stored["turns"][:len(older)] != older:
+                    return None
+                stored["turns"] = stored["turns"][len(older):]
+                stored["summary"] = summary
+                stored["updated_at"] = time.time()
+                return stored
+
+            if await self._store.aupdate(session_id, trim) is not None:
+                self.stats["compactions"] += 1
+        except Exception as e:
+            print(f"Chat session compaction failed for {session_id}: {e}")
+        finally:
+            self._compacting.discard(session_id)
+
+    async def _fold(self, summary: str, turns: List[dict]) -> str:
+        if llm_manager.is_available("chat_memory"):
+            prompt = f"""Existing summary:
+{summary or "(none)"}
+
+New turns:
+{_format_turns(turns)}"""
+            try:
+                response = await llm_manager.ainvoke([
+                    SystemMessage(content=MEMORY_SYSTEM_PROMPT),
+                    HumanMessage(content=prompt)
+                ], endpoint="chat_memory", temperature=0.2)
+                return response.content.strip()
+            except Exception as e:
+                print(f"LLM memory summary failed, using extractive fallback: {e}")
+
+        self.stats["local_compactions"] += 1
+        return extractive_summary(
+            f"{summary}\n{_format_turns(turns)}".strip(),
+            max_tokens=settings.CHAT_SESSION_SUMMARY_TOKENS
+        )
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "compacting": len(self._compacting),
+            "stored": self._store.stats()
+        }
+
+
+# Singleton instance
+chat_sessions = ChatSessionStore()
@@ -0,0 +1,278 @@
+"""
+Local article corpus for retrieval-augmented chat.
+
+Feed/search items (title + summary) and scraped article text are indexed as
+passages of a few sentences each. Chat asks the corpus first and ranks
+passages with BM25; external web search is only needed when nothing local
+covers the question well.
+
+Documents are persisted in the SQLite cache and the in-memory inverted
+index is rebuilt from it at startup, off the event loop (see main.py).
+Ingestion also splits, tokenizes and persists documents in a worker
+thread; only the cheap index updates run on the event loop.
+"""
+import asyncio
+import hashlib
+import heapq
+import math
+import re
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.cache import PersistentCache
+from app.core.config import settings
+from app.core.filtering import canonical_url
+from app.core.ledger import estimate_tokens
+from app.services.extractive import STOPWORDS, split_sentences
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def split_passages(text: str, max_tokens: int) -> List[str]:
+    """Group consecutive sentences into passages of up to max_tokens."""
+    passages, current, size = [], [], 0
+    for sentence in split_sentences(text):
+        tokens = estimate_tokens(sentence)
+        if current and size + tokens > max_tokens:
+            passages.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += tokens
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def _make_document(
+    url: str,
+    title: str,
+    text: str,
+    source: Optional[str],
+    published_at: Optional[str]
+) -> Optional[dict]:
+    """The stored form of an article, or None if it is too short to index."""
+    if not url or not text or len(text) < 80:
+        return None
+    return {
+        "url": url,
+        "title": title or "",
+        "text": text,
+        "source": source or "",
+        "published_at": published_at or "",
+        "hash": hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    }
+
+
+class ArticleCorpus:
+    """
+    BM25 passage index over ingested articles.
+
+    Documents are keyed by canonical URL. Re-ingesting a URL replaces its
+    passages, but a document with full scraped text is never downgraded to
+    a shorter feed summary.
+    """
+
+    def __init__(self, max_documents: int = settings.CORPUS_MAX_DOCUMENTS):
+        self.max_documents = max_documents
+        self._store = PersistentCache("corpus", max_entries=max_documents, ttl=settings.CORPUS_TTL)
+        self._loaded = False
+        self._documents: "OrderedDict[str, dict]" = OrderedDict()
+        self._passages: Dict[int, dict] = {}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._doc_passages: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._total_length = 0
+        self.stats = {"ingested": 0, "searches": 0, "local_answers": 0}
+
+    def load(self) -> int:
+        """Rebuild the index from the persistent store; returns the document count."""
+        if not self._loaded:
+            self._loaded = True
+            for key, document in self._store.items():
+                self._insert(key, document, self._analyze(document))
+        return len(self._documents)
+
+    def _ensure_loaded(self) -> None:
+        # Normally a no-op: main.py loads the corpus before serving requests
+        if not self._loaded:
+            self.load()
+
+    async def add_document(
+        self,
+        url: str,
+        title: str,
+        text: str,
+        source: Optional[str] = None,
+        published_at: Optional[str] = None
+    ) -> bool:
+        """Index an article; returns False if it was unchanged or too short."""
+        document = _make_document(url, title, text, source, published_at)
+        return bool(document) and await self._add([document]) == 1
+
+    async def add_items(self, items: Iterable[dict]) -> int:
+        """Index feed/search results (NewsItem dicts) by their title and summary."""
+        documents = [
+            _make_document(
+                item.get("url", ""),
+                item.get("title", ""),
+                f"{item.get('title', '')}. {item.get('summary') or ''}",
+                item.get("source"),
+                item.get("published_at")
+            )
+            for item in items
+        ]
+        return await self._add([d for d in documents if d])
+
+    def _is_new(self, key: str, document: dict) -> bool:
+        existing = self._documents.get(key)
+        return not existing or (
+            existing["hash"] != document["hash"] and len(existing["text"]) <= len(document["text"])
+        )
+
+    async def _add(self, documents: List[dict]) -> int:
+        self._ensure_loaded()
+        fresh = {}
+        for document in documents:
+            key = canonical_url(document["url"])
+            if self._is_new(key, document):
+                fresh[key] = document
+        if not fresh:
+            return 0
+
+        loop = asyncio.get_running_loop()
+        analyzed = await loop.run_in_executor(
+            None, lambda: [self._analyze(document) for document in fresh.values()]
+        )
+        added = []
+        for (key, document), passages in zip(fresh.items(), analyzed):
+            # Another request may have indexed a longer copy in the meantime
+            if self._is_new(key, document):
+                self._insert(key, document, passages)
+                added.append((key, document))
+        await loop.run_in_executor(None, self._persist, added)
+        self.stats["ingested"] += len(added)
+        return len(added)
+
+    def _persist(self, documents: List[Tuple[str, dict]]) -> None:
+        for key, document in documents:
+            self._store.set(key, document)
+
+    def _analyze(self, document: dict) -> List[Tuple[str, Counter]]:
+        """Passages and their term counts. Touches no shared state, so it can run in a worker thread."""
+        analyzed = []
+        for passage in split_passages(document["text"], settings.CORPUS_PASSAGE_TOKENS):
+            # The title is indexed with every passage so it can anchor a match
+            terms = Counter(tokenize(f"{document['title']} {passage}"))
+            if terms:
+                analyzed.append((passage, terms))
+        return analyzed
+
+    def _insert(self, key: str, document: dict, passages: List[Tuple[str, Counter]]) -> None:
+        self._remove(key)
+        self._documents[key] = document
+        self._documents.move_to_end(key)
+
+        ids = []
+        for passage, terms in passages:
+            pid = self._next_id
+            self._next_id += 1
+            length = sum(terms.values())
+            self._passages[pid] = {"doc": key, "text": passage, "length": length, "terms": list(terms)}
+            for term, count in terms.items():
+                self._postings[term][pid] = count
+            self._total_length += length
+            ids.append(pid)
+        self._doc_passages[key] = ids
+
+        while len(self._documents) > self.max_documents:
+            oldest = next(iter(self._documents))
+            self._remove(oldest)
+
+    def _remove(self, key: str) -> None:
+        for pid in self._doc_passages.pop(key, []):
+            passage = self._passages.pop(pid)
+            self._total_length -= passage["length"]
+            for term in passage["terms"]:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(pid, None)
+                    if not postings:
+                        del self._postings[term]
+        self._documents.pop(key, None)
+
+    def search(self, query: str, k: int = 5, per_document: int = 2) -> List[dict]:
+        """
+        Top-k passages by BM25, at most per_document from any one article.
+        Each hit carries its score and the share of query terms it matched.
+        """
+        self._ensure_loaded()
+        self.stats["searches"] += 1
+        terms = set(tokenize(query))
+        if not terms or not self._passages:
+            return []
+
+        count = len(self._passages)
+        average_length = self._total_length / count
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for pid, tf in postings.items():
+                length = self._passages[pid]["length"]
+                scores[pid] += idf * tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                )
+                matched[pid] += 1
+
+        hits = []
+        per_doc: Dict[str, int] = defaultdict(int)
+        for pid in heapq.nlargest(k * 4, scores, key=scores.get):
+            passage = self._passages[pid]
+            if per_doc[passage["doc"]] >= per_document:
+                continue
+            per_doc[passage["doc"]] += 1
+            document = self._documents[passage["doc"]]
+            hits.append({
+                "title": document["title"],
+                "url": document["url"],
+                "source": document["source"],
+                "text": passage["text"],
+                "score": round(scores[pid], 3),
+                "coverage": matched[pid] / len(terms)
+            })
+            if len(hits) >= k:
+                break
+        return hits
+
+    def has_good_recall(self, hits: List[dict]) -> bool:
+        """
+        Whether local hits cover the question well enough to skip web search:
+        enough passages matching a good share of the query terms.
+        """
+        strong = [h for h in hits if h["coverage"] >= settings.CORPUS_MIN_COVERAGE]
+        good = len(strong) >= settings.CORPUS_MIN_PASSAGES
+        if good:
+            self.stats["local_answers"] += 1
+        return good
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "documents": len(self._documents),
+            "passages": len(self._passages),
+            "terms": len(self._postings)
+        }
+
+
+# Singleton instance
+article_corpus = ArticleCorpus()
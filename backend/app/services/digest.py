@@ -0,0 +1,338 @@
+"""
+Cached, composable and pre-generated daily digests.
+
+A digest is assembled from per-category fragments (a short summary plus
+headlines), each generated once per time bucket and shared by every user
+whose category set includes it, so LLM calls grow with the number of
+categories rather than the number of users. Assembly is local; the optional
+stitching pass (DIGEST_STITCH) is one small call per distinct category set.
+
+Right after a bucket rolls over, the previous bucket's digests are served
+while fresh ones are built in the background, and a scheduler builds the
+fragments and digests for the most requested category sets (plus
+DIGEST_PREGENERATE_COMBOS) at the start of every bucket.
+"""
+import asyncio
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.agents.chat_agent import generate_category_fragment, stitch_digest
+from app.core.cache import PersistentCache
+from app.core.config import settings
+from app.core.ledger import llm_ledger
+from app.core.llm import llm_manager
+from app.services.audio import audio_cache, render_speech
+
+DEFAULT_DIGEST_CATEGORIES = ["Technology", "Business", "Science"]
+
+DIGEST_AUDIO_LANGUAGE = "en"
+
+_CANONICAL_CATEGORIES = {c.lower(): c for c in settings.NEWS_CATEGORIES}
+
+
+class UnknownCategoryError(ValueError):
+    """Raised for digest categories that aren't in settings.NEWS_CATEGORIES."""
+
+
+def normalize_categories(categories: Optional[List[str]]) -> Tuple[str, ...]:
+    """
+    Canonical, order-insensitive category set (the first 3 distinct categories).
+
+    Raises:
+        UnknownCategoryError: If a name isn't one of settings.NEWS_CATEGORIES
+    """
+    seen, unknown = [], []
+    for category in categories or DEFAULT_DIGEST_CATEGORIES:
+        name = " ".join(category.split())
+        if not name:
+            continue
+        canonical = _CANONICAL_CATEGORIES.get(name.lower())
+        if canonical is None:
+            unknown.append(name)
+        elif canonical not in seen:
+            seen.append(canonical)
+    if unknown:
+        raise UnknownCategoryError(f"Unknown categories: {', '.join(unknown)}")
+    if not seen:
+        return normalize_categories(DEFAULT_DIGEST_CATEGORIES)
+    return tuple(sorted(seen[:3]))
+
+
+def current_bucket() -> int:
+    return int(time.time() // settings.DIGEST_BUCKET_SECONDS)
+
+
+def parse_combos(value: str) -> List[Tuple[str, ...]]:
+    combos = []
+    for combo in value.split(";"):
+        if not combo.strip():
+            continue
+        try:
+            combos.append(normalize_categories(combo.split(",")))
+        except UnknownCategoryError as e:
+            print(f"Ignoring digest combo '{combo}': {e}")
+    return combos
+
+
+def assemble_digest(fragments: List[dict]) -> Tuple[str, List[str]]:
+    """
+    Local assembly: one paragraph per category, then the top headlines taken
+    round-robin so every category is represented.
+    """
+    paragraphs = [f"**{f['category']}**: {f['summary']}" for f in fragments if f.get("summary")]
+    headlines = []
+    for rank in range(3):
+        for fragment in fragments:
+            if rank < len(fragment["headlines"]) and len(headlines) < 5:
+                headlines.append(fragment["headlines"][rank])
+    digest = "\n\n".join(paragraphs)
+    if headlines:
+        digest += "\n\nTop headlines:\n" + "\n".join(f"{i}. {h}" for i, h in enumerate(headlines, 1))
+    return digest, headlines
+
+
+def digest_speech_text(digest: str) -> str:
+    """Digest text as it should be read aloud (no Markdown emphasis)."""
+    return re.sub(r'\*\*|__', '', digest)
+
+
+class DigestService:
+    """
+    Two-level cache keyed by time bucket: fragments per category and
+    assembled digests per category set. Concurrent requests for the same
+    entry share one build, and digests from the previous bucket are served
+    while their replacement is built.
+    """
+
+    def __init__(self):
+        ttl = settings.DIGEST_BUCKET_SECONDS * 2
+        self._fragments = PersistentCache(
+            "digest_fragments", max_entries=settings.DIGEST_CACHE_MAX_ENTRIES, ttl=ttl
+        )
+        self._digests = PersistentCache(
+            "digests", max_entries=settings.DIGEST_CACHE_MAX_ENTRIES, ttl=ttl
+        )
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Requests per category set, halved every bucket so old demand fades
+        self._popularity: Counter = Counter()
+        self._popularity_bucket = current_bucket()
+        self._scheduler: Optional[asyncio.Task] = None
+        self.stats = {
+            "hits": 0, "misses": 0, "assembled": 0,
+            "fragment_hits": 0, "fragments_generated": 0, "pregenerated": 0,
+            "audio_rendered": 0, "audio_failed": 0
+        }
+
+    def _start(self, key: str, build: Callable[[], Awaitable[dict]]) -> asyncio.Task:
+        """Run build() once per key, however many callers are waiting for it."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(build())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _cached(
+        self,
+        cache: PersistentCache,
+        name: str,
+        bucket: int,
+        build: Callable[[str], Awaitable[dict]],
+        allow_stale: bool = True
+    ) -> Tuple[dict, bool]:
+        """
+        Current-bucket entry, else (if allow_stale) the previous bucket's while
+        a refresh runs in the background, else a fresh build.
+        Returns (value, was_cached).
+        """
+        key = f"{bucket}:{name}"
+        cached = await cache.aget(key)
+        if cached:
+            return cached, True
+        # Fragment and digest keys can coincide (a one-category digest), so
+        # in-flight builds are tracked per cache
+        task = self._start(f"{cache.name}:{key}", lambda: build(key))
+        previous = await cache.aget(f"{bucket - 1}:{name}") if allow_stale else None
+        if previous:
+            return previous, True
+        return await asyncio.shield(task), False
+
+    async def get_fragment(self, category: str, bucket: Optional[int] = None) -> dict:
+        """
+        Fragment for the bucket. Never stale: digests built from it are cached
+        for the whole bucket.
+        """
+        bucket = current_bucket() if bucket is None else bucket
+        fragment, cached = await self._cached(
+            self._fragments, category, bucket,
+            lambda key: self._build_fragment(category, key),
+            allow_stale=False
+        )
+        if cached:
+            self.stats["fragment_hits"] += 1
+        return fragment
+
+    async def _build_fragment(self, category: str, key: str) -> dict:
+        fragment = await generate_category_fragment(category)
+        self.stats["fragments_generated"] += 1
+        # Headline-only fallbacks are retried on the next request instead of kept for the bucket
+        if not fragment.get("degraded"):
+            await self._fragments.aset(key, fragment)
+        return fragment
+
+    async def get_digest(self, categories: Optional[List[str]] = None) -> dict:
+        """Digest for the category set, assembled from cached fragments."""
+        cats = normalize_categories(categories)
+        self._count_request(cats)
+        digest, cached = await self._cached(
+            self._digests, "|".join(cats), current_bucket(),
+            lambda key: self._build_digest(cats, key)
+        )
+        self.stats["hits" if cached else "misses"] += 1
+        return {**digest, "cached": cached}
+
+    async def _build_digest(self, cats: Tuple[str, ...], key: str) -> dict:
+        bucket = int(key.split(":", 1)[0])
+        fragments = await asyncio.gather(*[self.get_fragment(cat, bucket) for cat in cats])
+        fragments = [f for f in fragments if f.get("headlines")]
+        self.stats["assembled"] += 1
+        if not fragments:
+            return {
+                "digest": "No news available at this time.",
+                "headlines": [],
+                "generated_at": datetime.now().isoformat()
+            }
+
+        digest, headlines = assemble_digest(fragments)
+        degraded = any(f.get("degraded") for f in fragments)
+        if settings.DIGEST_STITCH and not degraded and llm_manager.is_available("digest_stitch"):
+            try:
+                digest = await stitch_digest(fragments) + "\n\nTop headlines:\n" + "\n".join(
+                    f"{i}. {h}" for i, h in enumerate(headlines, 1)
+                )
+            except Exception as e:
+                # The locally assembled digest is a perfectly good answer
+                print(f"Digest stitching failed, using assembled digest: {e}")
+                llm_ledger.record_degraded("digest_stitch")
+
+        result = {
+            "digest": digest,
+            "headlines": headlines,
+            "generated_at": datetime.now().isoformat(),
+            "categories": list(cats)
+        }
+        if not degraded:
+            await self._digests.aset(key, result)
+            self._render_audio(key, result)
+        return result
+
+    def _render_audio(self, key: str, digest: dict) -> None:
+        """Render the spoken briefing in the background and attach its audio_id to the cached digest."""
+        if settings.DIGEST_AUDIO_ENABLED:
+            self._start(f"audio:{key}", lambda: self._build_audio(key, digest))
+
+    async def _build_audio(self, key: str, digest: dict) -> dict:
+        text = digest_speech_text(digest["digest"])
+        path = await render_speech(text, DIGEST_AUDIO_LANGUAGE)
+        if not path:
+            self.stats["audio_failed"] += 1
+            return digest
+        digest = {**digest, "audio_id": audio_cache.make_key(text, DIGEST_AUDIO_LANGUAGE)}
+        await self._digests.aset(key, digest)
+        self.stats["audio_rendered"] += 1
+        return digest
+
+    def get_digest_audio(self, categories: Optional[List[str]] = None) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        (digest, audio path) for the newest cached digest of the category set.
+        The path is None while the briefing is still rendering; the digest is
+        None if no digest has been generated for the set recently.
+        """
+        cats = "|".join(normalize_categories(categories))
+        bucket = current_bucket()
+        for key in (f"{bucket}:{cats}", f"{bucket - 1}:{cats}"):
+            digest = self._digests.get(key)
+            if not digest:
+                continue
+            path = audio_cache.get(digest["audio_id"]) if digest.get("audio_id") else None
+            if not path:
+                # Not rendered yet, or evicted from the audio cache since
+                self._render_audio(key, digest)
+            return digest, path
+        return None, None
+
+    def _count_request(self, cats: Tuple[str, ...]) -> None:
+        bucket = current_bucket()
+        if bucket != self._popularity_bucket:
+            halvings = min(bucket - self._popularity_bucket, 32)
+            self._popularity = Counter({
+                c: n >> halvings for c, n in self._popularity.items() if n >> halvings
+            })
+            self._popularity_bucket = bucket
+        self._popularity[cats] += 1
+
+    def popular_combos(self) -> List[Tuple[str, ...]]:
+        combos = parse_combos(settings.DIGEST_PREGENERATE_COMBOS)
+        for cats, _ in self._popularity.most_common(settings.DIGEST_PREGENERATE_TOP_N):
+            if cats not in combos:
+                combos.append(cats)
+        return combos
+
+    async def pregenerate(self) -> int:
+        """Build the current bucket's fragments and digests for popular category sets."""
+        if not llm_manager.is_available("digest"):
+            return 0
+        bucket = current_bucket()
+        built = 0
+        for cats in self.popular_combos():
+            key = f"{bucket}:{'|'.join(cats)}"
+            if await self._digests.aget(key):
+                continue
+            try:
+                # One set at a time: this is background work and shouldn't crowd the LLM limits
+                await self._start(
+                    f"{self._digests.name}:{key}",
+                    lambda cats=cats, key=key: self._build_digest(cats, key)
+                )
+                built += 1
+            except Exception as e:
+                print(f"Digest pre-generation failed for {cats}: {e}")
+        self.stats["pregenerated"] += built
+        return built
+
+    async def _run_scheduler(self) -> None:
+        while True:
+            try:
+                await self.pregenerate()
+            except Exception as e:
+                print(f"Digest scheduler error: {e}")
+            # Wake up just after the next bucket starts
+            next_bucket_at = (current_bucket() + 1) * settings.DIGEST_BUCKET_SECONDS
+            await asyncio.sleep(max(1.0, next_bucket_at - time.time() + 5))
+
+    def start_scheduler(self) -> None:
+        if settings.DIGEST_PREGENERATE_ENABLED and (self._scheduler is None or self._scheduler.done()):
+            self._scheduler = asyncio.create_task(self._run_scheduler())
+
+    async def stop_scheduler(self) -> None:
+        if self._scheduler:
+            self._scheduler.cancel()
+            try:
+                await self._scheduler
+            except asyncio.CancelledError:
+                pass
+            self._scheduler = None
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "digests": len(self._digests),
+            "fragments": len(self._fragments),
+            "popular": ["|".join(c) for c, _ in self._popularity.most_common(settings.DIGEST_PREGENERATE_TOP_N)]
+        }
+
+
+# Singleton instance
+digest_service = DigestService()
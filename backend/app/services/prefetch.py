@@ -0,0 +1,137 @@
+"""
+Low-priority background prefetch of article content (and optionally summaries)
+for the top items of feed and trend results, so the first "summarize" click
+is served from cache.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Iterable, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.filtering import is_domain_accessible
+from app.services.scraper import fetch_article_content, get_cached_content
+from app.services.summarizer import get_cached_summary, summarize_url
+from app.services.transcript import get_transcript, is_youtube_url
+
+
+class PrefetchQueue:
+    """
+    Bounded queue drained by a single background worker.
+
+    The worker pauses whenever interactive requests are in flight, so prefetch
+    work never competes with a user waiting on a response. URLs already queued
+    or recently prefetched are skipped, and new URLs are dropped when the
+    queue is full rather than blocking the request that enqueued them.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.PREFETCH_QUEUE_SIZE,
+        summarize: bool = settings.PREFETCH_SUMMARIZE
+    ):
+        self.max_size = max_size
+        self.summarize = summarize
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._active_interactive = 0
+        self._recent = TTLCache(max_entries=2000, ttl=settings.SCRAPE_CACHE_TTL)
+        self.stats = {"enqueued": 0, "dropped": 0, "prefetched": 0, "summarized": 0, "failed": 0}
+
+    def _ensure_worker(self) -> None:
+        # Created lazily so they bind to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._idle = asyncio.Event()
+            self._idle.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        """Queue URLs for prefetch; returns how many were actually queued."""
+        if not settings.PREFETCH_ENABLED:
+            return 0
+        self._ensure_worker()
+        queued = 0
+        for url in urls:
+            if not url or not url.startswith("http") or url in self._recent:
+                continue
+            # Videos are transcribed rather than scraped, so the publisher block list doesn't apply
+            if not is_youtube_url(url) and not is_domain_accessible(url):
+                continue
+            try:
+                self._queue.put_nowait(url)
+            except asyncio.QueueFull:
+                self.stats["dropped"] += 1
+                break
+            self._recent.set(url, True)
+            queued += 1
+        self.stats["enqueued"] += queued
+        return queued
+
+    @asynccontextmanager
+    async def interactive(self):
+        """Mark an interactive request as in flight; prefetching pauses meanwhile."""
+        self._ensure_worker()
+        self._active_interactive += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._active_interactive -= 1
+            if self._active_interactive == 0:
+                self._idle.set()
+
+    async def _run(self) -> None:
+        while True:
+            url = await self._queue.get()
+            try:
+                await self._idle.wait()
+                await self._prefetch(url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"Prefetch failed for {url}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _prefetch(self, url: str) -> None:
+        if self.summarize:
+            cached = get_cached_content(url)
+            if cached and await get_cached_summary(url, cached["content"]):
+                return
+            summary = await summarize_url(url)
+            if summary:
+                self.stats["summarized"] += 1
+            else:
+                self.stats["failed"] += 1
+            return
+
+        if is_youtube_url(url):
+            # get_transcript keeps its own cache
+            fetched = await get_transcript(url)
+        elif get_cached_content(url):
+            return
+        else:
+            fetched = await fetch_article_content(url)
+        if fetched:
+            self.stats["prefetched"] += 1
+        else:
+            self.stats["failed"] += 1
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "paused": self._active_interactive > 0
+        }
+
+
+# Singleton instance
+prefetch_queue = PrefetchQueue()
+
+
+def prefetch_top_items(items: list, top_n: int = settings.PREFETCH_TOP_N) -> None:
+    """Queue the top-N items of a result set for background prefetch."""
+    prefetch_queue.enqueue(item.url for item in items[:top_n])
@@ -2,47 +2,228 @@ import httpx
 from bs4 import BeautifulSoup
 import re
 import asyncio
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse
 from concurrent.futures import ThreadPoolExecutor
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.filtering import domain_health, get_domain
+from app.services.corpus import article_corpus
 
 _executor = ThreadPoolExecutor(max_workers=3)
 
-async def fetch_article_content(url: str) -> dict:
+# Full "Chrome on Windows" headers to look like a real user
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.google.com/',
+    'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    'Sec-Ch-Ua-Mobile': '?0',
+    'Sec-Ch-Ua-Platform': '"Windows"',
+    'Upgrade-Insecure-Requests': '1',
+    'Cache-Control': 'max-age=0'
+}
+
+# Recently extracted articles, keyed by URL
+_content_cache = TTLCache(
+    max_entries=settings.SCRAPE_CACHE_MAX_ENTRIES,
+    ttl=settings.SCRAPE_CACHE_TTL
+)
+
+# Learned per-domain lightweight alternate (AMP / print) URL patterns
+_alternate_patterns: Dict[str, dict] = {}
+
+# Drop a learned pattern after this many consecutive failed alternate fetches
+_MAX_ALTERNATE_MISSES = 2
+
+# Bytes transferred and extraction time, split by page variant, so the
+# full page and the lightweight alternate can be compared
+_scrape_stats = {
+    variant: {"articles": 0, "bytes": 0, "extract_ms": 0.0}
+    for variant in ("full", "alternate")
+}
+
+
+def learn_alternate_pattern(article_url: str, alternate_url: str) -> Optional[dict]:
+    """
+    Derive a reusable rewrite rule from an article URL and its AMP/print alternate.
+
+    The alternate path must contain the article path, e.g.
+    /world/story -> /amp/world/story, /world/story/amp or amp.site.com/world/story.
+    Returns None when the relationship can't be generalized to other articles.
+    """
+    article = urlparse(article_url)
+    alternate = urlparse(alternate_url)
+    article_path = article.path.rstrip("/")
+    if not article_path:
+        return None
+
+    index = alternate.path.find(article_path)
+    if index < 0:
+        return None
+
+    if article.query and alternate.query != article.query:
+        return None
+
+    pattern = {
+        "host": alternate.netloc if alternate.netloc != article.netloc else None,
+        "prefix": alternate.path[:index],
+        "suffix": alternate.path[index + len(article_path):],
+        "query": alternate.query if not article.query else None,
+        "misses": 0
+    }
+
+    # Only keep rules that reproduce the alternate we actually saw
+    if apply_alternate_pattern(article_url, pattern) != urlunparse(alternate._replace(fragment="")):
+        return None
+    if not (pattern["host"] or pattern["prefix"] or pattern["suffix"].strip("/") or pattern["query"]):
+        return None
+    return pattern
+
+
+def apply_alternate_pattern(article_url: str, pattern: dict) -> str:
+    """Build the lightweight alternate URL for an article using a learned pattern."""
+    article = urlparse(article_url)
+    path = pattern["prefix"] + article.path.rstrip("/") + pattern["suffix"]
+    return urlunparse(article._replace(
+        netloc=pattern["host"] or article.netloc,
+        path=path,
+        query=pattern["query"] if pattern["query"] is not None else article.query,
+        fragment=""
+    ))
+
+
+def get_scrape_stats() -> dict:
+    """Average bytes and extraction time per article for full pages vs alternates."""
+    stats = {}
+    for variant, entry in _scrape_stats.items():
+        articles = entry["articles"]
+        stats[variant] = {
+            "articles": articles,
+            "avg_bytes": round(entry["bytes"] / articles) if articles else 0,
+            "avg_extract_ms": round(entry["extract_ms"] / articles, 1) if articles else 0.0
+        }
+    stats["learned_patterns"] = len(_alternate_patterns)
+    stats["cache"] = _content_cache.stats()
+    return stats
+
+
+async def _extract_timed(content: bytes, variant: str) -> Tuple[Optional[dict], Optional[str]]:
+    """Run extraction off the event loop and record bytes/extraction time for the variant."""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    result, alternate_href = await loop.run_in_executor(_executor, extract_with_alternate, content)
+    extract_ms = (time.perf_counter() - started) * 1000
+    if result:
+        entry = _scrape_stats[variant]
+        entry["articles"] += 1
+        entry["bytes"] += len(content)
+        entry["extract_ms"] += extract_ms
+    return result, alternate_href
+
+
+async def _fetch_alternate(url: str, alternate_url: str, client: httpx.AsyncClient) -> Optional[dict]:
+    """Fetch and extract the lightweight alternate page, returning None on any failure."""
+    try:
+        response = await client.get(alternate_url, headers=BROWSER_HEADERS)
+        response.raise_for_status()
+        result, _ = await _extract_timed(response.content, "alternate")
+        return result
+    except Exception as e:
+        print(f"Alternate fetch failed for {alternate_url}: {e}")
+        return None
+
+
+def get_cached_content(url: str) -> Optional[dict]:
+    """Return previously extracted content for a URL without fetching it."""
+    return _content_cache.get(url)
+
+
+async def fetch_article_content(url: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     """
     Fetches and extracts text content and title from a news article URL asynchronously.
     Returns a dict with 'title' and 'content'.
+
+    Successful extractions are cached for SCRAPE_CACHE_TTL seconds. Callers
+    fetching many articles can pass a shared client to reuse its connections.
+    """
+    cached = _content_cache.get(url)
+    if cached:
+        return cached
+
+    if client is None:
+        async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as own_client:
+            result = await _fetch_article_content_uncached(url, own_client)
+    else:
+        result = await _fetch_article_content_uncached(url, client)
+    if result:
+        _content_cache.set(url, result)
+        # Full article text makes much better chat context than feed snippets
+        await article_corpus.add_document(url, result.get("title", ""), result.get("content", ""))
+    return result
+
+
+async def _fetch_article_content_uncached(url: str, client: httpx.AsyncClient) -> dict:
     """
-    # 1. Try Direct Method with "Stealth" Headers
+    Fetch and extract an article, bypassing the content cache.
+
+    If a lightweight alternate (AMP or print) URL pattern has been learned for
+    the domain it is fetched first; the full page is only used as a fallback.
+    """
+    domain = get_domain(url)
     try:
-        # Full "Chrome on Windows" headers to look like a real user
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.google.com/',
-            'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-            'Sec-Ch-Ua-Mobile': '?0',
-            'Sec-Ch-Ua-Platform': '"Windows"',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0'
-        }
-        
-        async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
-            try:
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                response.raise_for_status()
-                # Run CPU-bound extraction in thread pool
-                loop = asyncio.get_running_loop()
-                return await loop.run_in_executor(_executor, extract_content_from_html, response.content)
-            except httpx.HTTPStatusError as e:
-                print(f"Direct fetch failed: {e}")
-                if e.response.status_code in [403, 401]:
-                    print("Attempting fallback to Google Cache...")
-                    return await fetch_from_google_cache(url, client)
-                return None
-            except httpx.RequestError as e:
-                print(f"Request error occurred: {e}")
-                return None
+        started = time.perf_counter()
+        # 1. Try the learned lightweight alternate first
+        pattern = _alternate_patterns.get(domain)
+        if pattern:
+            result = await _fetch_alternate(url, apply_alternate_pattern(url, pattern), client)
+            if result:
+                pattern["misses"] = 0
+                domain_health.record_success(url, (time.perf_counter() - started) * 1000)
+                return result
+            pattern["misses"] += 1
+            if pattern["misses"] >= _MAX_ALTERNATE_MISSES:
+                _alternate_patterns.pop(domain, None)
+
+        # 2. Try Direct Method with "Stealth" Headers
+        try:
+            response = await client.get(url, headers=BROWSER_HEADERS)
+            response.raise_for_status()
+            # Run CPU-bound extraction in thread pool
+            result, alternate_href = await _extract_timed(response.content, "full")
+
+            if alternate_href and domain not in _alternate_patterns:
+                alternate_url = urljoin(str(response.url), alternate_href)
+                learned = learn_alternate_pattern(str(response.url), alternate_url)
+                if learned:
+                    _alternate_patterns[domain] = learned
+                if not result:
+                    # Full page extraction failed; the alternate often works
+                    result = await _fetch_alternate(url, alternate_url, client)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if result:
+                domain_health.record_success(url, elapsed_ms)
+            else:
+                domain_health.record_failure(url, "too_short", elapsed_ms)
+            return result
+        except httpx.HTTPStatusError as e:
+            print(f"Direct fetch failed: {e}")
+            status = e.response.status_code
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if status in [403, 401]:
+                # Needing the cache path counts against the publisher either way
+                domain_health.record_failure(url, "cache_fallback", elapsed_ms)
+                print("Attempting fallback to Google Cache...")
+                return await fetch_from_google_cache(url, client)
+            domain_health.record_failure(url, f"http_{status}", elapsed_ms)
+            return None
+        except httpx.RequestError as e:
+            print(f"Request error occurred: {e}")
+            domain_health.record_failure(url, "request_error", (time.perf_counter() - started) * 1000)
+            return None
 
     except Exception as e:
         print(f"Error fetching article: {e}")
@@ -65,7 +246,6 @@ async def fetch_from_google_cache(url: str, client: httpx.AsyncClient) -> dict:
             print(f"Google Cache fetch failed with status: {response.status_code}")
             return None
             
-        print("Successfully fetched from Google Cache")
         print("Successfully fetched from Google Cache")
         loop = asyncio.get_running_loop()
         return await loop.run_in_executor(_executor, extract_content_from_html, response.content)
@@ -73,11 +253,38 @@ async def fetch_from_google_cache(url: str, client: httpx.AsyncClient) -> dict:
         print(f"Google Cache fallback error: {e}")
         return None
 
+def find_lightweight_alternate(soup: BeautifulSoup) -> Optional[str]:
+    """Return the href of the page's AMP or print-friendly alternate, if declared."""
+    amp = soup.find("link", rel="amphtml", href=True)
+    if amp:
+        return amp["href"]
+    for link in soup.find_all("link", rel="alternate", href=True):
+        if (link.get("media") or "").lower() == "print":
+            return link["href"]
+    return None
+
+def extract_with_alternate(content: bytes) -> Tuple[Optional[dict], Optional[str]]:
+    """Extract article content and the lightweight alternate href in a single parse"""
+    try:
+        soup = BeautifulSoup(content, 'html.parser')
+    except Exception as e:
+        print(f"Extraction error: {e}")
+        return None, None
+    # Look up the alternate before extraction strips elements from the tree
+    alternate_href = find_lightweight_alternate(soup)
+    return _extract_from_soup(soup), alternate_href
+
 def extract_content_from_html(content: bytes) -> dict:
     """Shared extraction logic for both direct and cache fetch"""
     try:
-        soup = BeautifulSoup(content, 'html.parser')
+        return _extract_from_soup(BeautifulSoup(content, 'html.parser'))
+    except Exception as e:
+        print(f"Extraction error: {e}")
+        return None
 
+def _extract_from_soup(soup: BeautifulSoup) -> dict:
+    """Pull the title and main article text out of a parsed page"""
+    try:
         # Extract title
         title = ""
         if soup.title and soup.title.string:
@@ -0,0 +1,401 @@
+"""
+Article summarization shared by /summarize and the background prefetcher
+"""
+import asyncio
+import hashlib
+import math
+import re
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.core.ledger import llm_ledger, estimate_tokens
+from app.core.llm import llm_manager, parse_json_response
+from app.services.extractive import SENTENCE_BOUNDARY, compress_text, extractive_summary
+from app.core.cache import PersistentCache
+from app.core.config import settings
+from app.core.filtering import canonical_url, get_domain, is_domain_accessible
+from app.services.scraper import fetch_article_content
+from app.services.transcript import get_transcript, is_youtube_url
+
+# Generated summaries, keyed by canonical URL + content hash so an edited
+# article is summarized again
+_summary_cache = PersistentCache(
+    "summaries",
+    max_entries=settings.SUMMARY_CACHE_MAX_ENTRIES,
+    ttl=settings.SUMMARY_CACHE_TTL
+)
+
+_stats = {"tokens_saved": 0, "tokens_spent": 0}
+
+
+def summary_cache_key(url: str, content: str) -> str:
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    return f"{canonical_url(url)}#{content_hash}"
+
+
+async def get_cached_summary(url: str, content: str) -> Optional[str]:
+    """Return a previously generated summary for this URL and content, if any."""
+    entry = await _summary_cache.aget(summary_cache_key(url, content))
+    llm_ledger.record_cache("summarize", bool(entry))
+    if not entry:
+        return None
+    _stats["tokens_saved"] += entry.get("tokens", 0)
+    return entry["summary"]
+
+
+async def store_summary(url: str, content: str, summary: str, tokens: int = 0) -> None:
+    await _summary_cache.aset(summary_cache_key(url, content), {"summary": summary, "tokens": tokens})
+
+
+def get_summary_cache_stats() -> dict:
+    return {**_summary_cache.stats(), **_stats}
+
+
+SUMMARY_SYSTEM_PROMPT = "You are a helpful news summarizer."
+
+# Values reported in the "engine" field of summarize responses
+ENGINE_LLM = "gemini"
+ENGINE_EXTRACTIVE = "extractive"
+
+_SENTENCE_BOUNDARY = re.compile(SENTENCE_BOUNDARY)
+
+
+def local_summary(content: str) -> str:
+    """Zero-latency extractive summary used for "fast" mode and LLM outages."""
+    return extractive_summary(content, max_tokens=settings.LOCAL_SUMMARY_TOKENS)
+
+
+def compress_for_prompt(content: str) -> str:
+    """Drop low-information sentences before the article text goes into a prompt."""
+    return compress_text(
+        content,
+        max_tokens=settings.SUMMARY_INPUT_TOKEN_BUDGET,
+        keep_ratio=settings.EXTRACTIVE_KEEP_RATIO
+    )
+
+
+def build_summary_prompt(title: str, content: str) -> str:
+    return f"""Summarize the following article text into a concise and engaging summary (max 300 words).
+        
+        Article Title: {title}
+        Article Text:
+        {content[:settings.SUMMARY_CHUNK_THRESHOLD]}
+        """
+
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into chunks of at most max_chars, breaking at paragraph
+    boundaries first, then sentence boundaries, and only mid-sentence for
+    sentences that are longer than a whole chunk.
+    """
+    pieces: List[str] = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_BOUNDARY.split(paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _summarize_chunks(title: str, content: str) -> str:
+    """
+    Map step for long articles: chunks are summarized concurrently (bounded
+    by SUMMARY_MAX_CONCURRENCY) and returned as numbered notes.
+    """
+    chunk_chars = max(
+        settings.SUMMARY_CHUNK_CHARS,
+        math.ceil(len(content) / settings.SUMMARY_MAX_CHUNKS)
+    )
+    chunks = split_into_chunks(content, chunk_chars)
+    semaphore = asyncio.Semaphore(settings.SUMMARY_MAX_CONCURRENCY)
+
+    async def summarize_chunk(index: int, chunk: str) -> str:
+        prompt = f"""Summarize part {index + 1} of {len(chunks)} of a news article in 3-5 short bullet points.
+Keep names, numbers and conclusions; skip anything that is not part of the story.
+
+Article Title: {title}
+Section Text:
+{chunk}
+"""
+        async with semaphore:
+            response = await llm_manager.ainvoke([
+                SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
+                HumanMessage(content=prompt)
+            ], endpoint="summarize")
+        return response.content
+
+    partials = await asyncio.gather(*(summarize_chunk(i, c) for i, c in enumerate(chunks)))
+    return "\n\n".join(f"Part {i + 1}:\n{partial}" for i, partial in enumerate(partials))
+
+
+def build_reduce_prompt(title: str, notes: str) -> str:
+    return f"""Combine these notes, taken from consecutive parts of one article, into a concise and engaging summary (max 300 words).
+Cover the whole article, including how it ends.
+
+Article Title: {title}
+Notes:
+{notes}
+"""
+
+
+async def _build_final_messages(title: str, content: str) -> list:
+    """
+    Messages for the call that produces the final summary: the article itself
+    for short pieces, or the reduce prompt over chunk notes (map-reduce) for
+    articles longer than SUMMARY_CHUNK_THRESHOLD characters.
+    """
+    # TextRank is CPU-bound; keep it off the event loop
+    loop = asyncio.get_running_loop()
+    content = await loop.run_in_executor(None, compress_for_prompt, content)
+    if len(content) > settings.SUMMARY_CHUNK_THRESHOLD:
+        notes = await _summarize_chunks(title, content)
+        prompt = build_reduce_prompt(title, notes)
+    else:
+        prompt = build_summary_prompt(title, content)
+    return [SystemMessage(content=SUMMARY_SYSTEM_PROMPT), HumanMessage(content=prompt)]
+
+
+async def summarize_content(title: str, content: str) -> str:
+    """
+    Summarize extracted article text with Gemini.
+
+    Articles longer than SUMMARY_CHUNK_THRESHOLD characters are summarized
+    with map-reduce instead of being truncated.
+
+    Raises:
+        LLMUnavailableError: If the LLM is not configured or its circuit is open
+    """
+    response = await llm_manager.ainvoke(
+        await _build_final_messages(title, content), endpoint="summarize"
+    )
+    return response.content
+
+
+async def stream_summary(url: str, title: str, content: str) -> AsyncIterator[str]:
+    """
+    Stream summary tokens as Gemini produces them. For long articles the map
+    step runs first and only the reduce call is streamed. The complete
+    summary is stored in the summary cache once the stream finishes.
+
+    Raises:
+        LLMUnavailableError: If the LLM is not configured or its circuit is open
+    """
+    messages = await _build_final_messages(title, content)
+    parts: List[str] = []
+    async for chunk in llm_manager.astream(messages, endpoint="summarize"):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+
+    summary = "".join(parts)
+    await _record_summary(url, content, summary)
+
+
+async def summarize_and_store(url: str, title: str, content: str) -> str:
+    """Summarize article text and record the result in the summary cache."""
+    summary = await summarize_content(title, content)
+    await _record_summary(url, content, summary)
+    return summary
+
+
+async def _record_summary(url: str, content: str, summary: str) -> None:
+    tokens = estimate_tokens(content) + estimate_tokens(summary)
+    _stats["tokens_spent"] += tokens
+    await store_summary(url, content, summary, tokens)
+
+
+async def summarize_url(url: str) -> Optional[str]:
+    """
+    Scrape (or transcribe) and summarize an article, going through both caches.
+    Returns None if the article can't be fetched or is too short.
+    """
+    if is_youtube_url(url):
+        result = await get_transcript(url)
+    else:
+        result = await fetch_article_content(url)
+    if not result or len(result.get("content", "")) < 100:
+        return None
+
+    content = result["content"]
+    cached = await get_cached_summary(url, content)
+    if cached:
+        return cached
+    return await summarize_and_store(url, result.get("title", ""), content)
+
+
+async def _summarize_pack(articles: List[dict]) -> Dict[int, str]:
+    """
+    Summarize several short articles in a single LLM call.
+    Returns summaries by article index; articles the model skipped are absent.
+    """
+    loop = asyncio.get_running_loop()
+    texts = await asyncio.gather(*(
+        loop.run_in_executor(None, compress_for_prompt, a["content"]) for a in articles
+    ))
+    sections = "\n\n".join(
+        f"### Article {i}\nTitle: {a['title']}\nText:\n{text[:settings.BATCH_PACK_MAX_CHARS]}"
+        for i, (a, text) in enumerate(zip(articles, texts))
+    )
+    prompt = f"""Summarize each of the following {len(articles)} news articles into a concise and engaging summary (max 150 words each).
+
+Respond with JSON only, in this exact format:
+{{"summaries": [{{"id": 0, "summary": "..."}}, ...]}}
+
+{sections}
+"""
+    response = await llm_manager.ainvoke([
+        SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
+        HumanMessage(content=prompt)
+    ], endpoint="summarize")
+    try:
+        parsed = parse_json_response(response.content)
+        return {
+            int(item["id"]): item["summary"]
+            for item in parsed.get("summaries", [])
+            if item.get("summary") and 0 <= int(item["id"]) < len(articles)
+        }
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"Could not parse packed summaries: {e}")
+        return {}
+
+
+async def summarize_batch(urls: List[str]) -> AsyncIterator[dict]:
+    """
+    Summarize many articles, yielding one result dict per unique URL as soon
+    as it is ready.
+
+    Duplicate URLs (after canonicalization) are dropped and cached summaries
+    are returned straight away. The remaining articles are scraped over one
+    shared HTTP client, with at most BATCH_SCRAPE_CONCURRENCY fetches overall
+    and BATCH_PER_HOST_LIMIT per publisher. Short articles are packed
+    BATCH_PACK_SIZE at a time into a single LLM call; long ones are
+    summarized on their own.
+    """
+    unique: List[str] = []
+    seen = set()
+    for url in urls:
+        key = canonical_url(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+
+    results: asyncio.Queue = asyncio.Queue()
+    tasks: List[asyncio.Task] = []
+    outstanding = 0
+    scrape_limit = asyncio.Semaphore(settings.BATCH_SCRAPE_CONCURRENCY)
+    host_limits = defaultdict(lambda: asyncio.Semaphore(settings.BATCH_PER_HOST_LIMIT))
+
+    def error_result(url: str, detail: str) -> dict:
+        return {"url": url, "success": False, "error": detail}
+
+    def summary_result(url: str, article: dict, summary: str, cached: bool, engine: str = ENGINE_LLM) -> dict:
+        return {
+            "url": url,
+            "success": True,
+            "title": article.get("title", ""),
+            "summary": summary,
+            "cached": cached,
+            "engine": engine
+        }
+
+    def local_result(url: str, article: dict) -> dict:
+        llm_ledger.record_degraded("summarize")
+        return summary_result(url, article, local_summary(article["content"]), False, ENGINE_EXTRACTIVE)
+
+    async def summarize_single(url: str, article: dict) -> None:
+        try:
+            summary = await summarize_and_store(url, article.get("title", ""), article["content"])
+            await results.put(summary_result(url, article, summary, False))
+        except Exception as e:
+            print(f"LLM Summarization error: {e}")
+            await results.put(local_result(url, article))
+
+    async def summarize_pack(pack: List[tuple]) -> None:
+        try:
+            summaries = await _summarize_pack([article for _, article in pack])
+        except Exception as e:
+            print(f"Packed summarization error: {e}")
+            summaries = {}
+        for i, (url, article) in enumerate(pack):
+            summary = summaries.get(i)
+            if summary:
+                await _record_summary(url, article["content"], summary)
+                await results.put(summary_result(url, article, summary, False))
+            else:
+                # The model dropped this one; fall back to an individual call
+                await summarize_single(url, article)
+
+    async def scrape(url: str, client: httpx.AsyncClient) -> tuple:
+        async with scrape_limit, host_limits[get_domain(url)]:
+            if is_youtube_url(url):
+                return url, await get_transcript(url)
+            return url, await fetch_article_content(url, client=client)
+
+    try:
+        async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
+            accessible = []
+            for url in unique:
+                # Videos are transcribed rather than scraped, so the publisher block list doesn't apply
+                if is_youtube_url(url) or is_domain_accessible(url):
+                    accessible.append(url)
+                else:
+                    yield error_result(url, "Access to this article is restricted by the publisher.")
+
+            pack: List[tuple] = []
+            scrapes = [asyncio.create_task(scrape(url, client)) for url in accessible]
+            tasks.extend(scrapes)
+            for next_scrape in asyncio.as_completed(scrapes):
+                url, article = await next_scrape
+                if not article or len(article.get("content", "")) < 100:
+                    yield error_result(url, "Could not extract enough content to summarize.")
+                    continue
+
+                cached = await get_cached_summary(url, article["content"])
+                if cached:
+                    yield summary_result(url, article, cached, True)
+                elif not llm_manager.is_available("summarize"):
+                    yield local_result(url, article)
+                else:
+                    outstanding += 1
+                    if len(article["content"]) > settings.BATCH_PACK_MAX_CHARS:
+                        tasks.append(asyncio.create_task(summarize_single(url, article)))
+                    else:
+                        pack.append((url, article))
+                        if len(pack) >= settings.BATCH_PACK_SIZE:
+                            tasks.append(asyncio.create_task(summarize_pack(pack)))
+                            pack = []
+
+                while not results.empty():
+                    outstanding -= 1
+                    yield results.get_nowait()
+
+        if pack:
+            tasks.append(asyncio.create_task(summarize_pack(pack)))
+        while outstanding > 0:
+            outstanding -= 1
+            yield await results.get()
+    finally:
+        # Stop paying for summaries nobody is waiting for any more
+        for task in tasks:
+            task.cancel()
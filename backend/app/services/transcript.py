@@ -0,0 +1,230 @@
+"""
+Transcripts for YouTube news videos, so they can be summarized like articles.
+
+Subtitles are found with yt-dlp (manual tracks first, then automatic
+captions; English, then Hindi), parsed from json3 or WebVTT and normalized
+into plain text. Extraction runs in a small dedicated thread pool and the
+result is cached permanently by video ID.
+
+Setting TRANSCRIPT_FIXTURE_DIR switches to fixture mode: video metadata is
+read from <dir>/<video_id>.info.json (a `yt-dlp --dump-json` dump) and each
+subtitle format's "url" is treated as a file name inside the same directory.
+"""
+import asyncio
+import html
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+from app.core.cache import PersistentCache, TTLCache
+from app.core.config import settings
+
+SUBTITLE_LANGUAGES = ["en", "hi"]
+
+# Preferred subtitle formats, best first
+SUBTITLE_FORMATS = ["json3", "vtt"]
+
+YOUTUBE_HOSTS = {"youtube.com", "www.youtube.com", "m.youtube.com", "youtu.be"}
+
+YDL_OPTIONS = {
+    'skip_download': True,
+    'quiet': True,
+    'no_warnings': True,
+    'http_headers': {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Referer': 'https://www.youtube.com/',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+}
+
+_VIDEO_ID = re.compile(r'^[0-9A-Za-z_-]{11}$')
+_VTT_TIMING = re.compile(r'^\d{2}:\d{2}(:\d{2})?\.\d{3} --> ')
+_TAGS = re.compile(r'<[^>]+>')
+# Non-speech cues such as [Music] or (applause)
+_CUES = re.compile(r'\[[^\]]*\]|\((?:music|applause|laughter|inaudible)\)', re.IGNORECASE)
+
+_executor = ThreadPoolExecutor(max_workers=settings.TRANSCRIPT_WORKERS)
+
+# Transcripts of a published video don't change, so they never expire
+_transcripts = PersistentCache("transcripts", max_entries=settings.TRANSCRIPT_CACHE_MAX_ENTRIES)
+
+# Videos without usable subtitles; retried later since auto captions can appear
+_unavailable = TTLCache(max_entries=1000, ttl=3600)
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """Video ID from a YouTube watch/shorts/embed/youtu.be URL, or None."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host not in YOUTUBE_HOSTS:
+        return None
+
+    if host == "youtu.be":
+        candidate = parsed.path.strip("/").split("/")[0]
+    elif parsed.path == "/watch":
+        candidate = parse_qs(parsed.query).get("v", [""])[0]
+    else:
+        parts = parsed.path.strip("/").split("/")
+        candidate = parts[1] if len(parts) > 1 and parts[0] in ("shorts", "embed", "live", "v") else ""
+
+    return candidate if _VIDEO_ID.match(candidate) else None
+
+
+def is_youtube_url(url: str) -> bool:
+    return extract_video_id(url) is not None
+
+
+def select_subtitle(info: Dict) -> Optional[Tuple[str, str, Dict]]:
+    """
+    Pick (language, kind, format) from yt-dlp metadata:
+    manual tracks before automatic captions, en before hi, json3 before vtt.
+    """
+    tracks = [
+        ("manual", info.get("subtitles") or {}),
+        ("auto", info.get("automatic_captions") or {}),
+    ]
+    for kind, available in tracks:
+        for lang in SUBTITLE_LANGUAGES:
+            # Automatic tracks may be keyed 'en-orig', 'en-US', ...
+            keys = [lang] + sorted(k for k in available if k.startswith(f"{lang}-"))
+            for key in keys:
+                formats = available.get(key) or []
+                for ext in SUBTITLE_FORMATS:
+                    for fmt in formats:
+                        if fmt.get("ext") == ext and fmt.get("url"):
+                            return lang, kind, fmt
+    return None
+
+
+def parse_json3(raw: str) -> List[str]:
+    """Caption lines from YouTube's json3 subtitle format."""
+    lines = []
+    for event in json.loads(raw).get("events", []):
+        text = "".join(seg.get("utf8", "") for seg in event.get("segs") or [])
+        if text.strip():
+            lines.append(text)
+    return lines
+
+
+def parse_vtt(raw: str) -> List[str]:
+    """Caption lines from a WebVTT file, without headers, cue timings or styling."""
+    lines = []
+    in_header = True
+    for line in raw.splitlines():
+        line = line.strip()
+        if in_header:
+            # Header block (WEBVTT, Kind:, Language:) ends at the first blank line
+            in_header = bool(line)
+            continue
+        if not line or line.isdigit() or _VTT_TIMING.match(line):
+            continue
+        lines.append(line)
+    return lines
+
+
+def normalize_transcript(lines: List[str]) -> str:
+    """
+    Join caption lines into plain text: strip tags and non-speech cues, and
+    drop the repeated lines that rolling automatic captions produce.
+    """
+    cleaned = []
+    for line in lines:
+        text = html.unescape(_TAGS.sub("", line))
+        text = " ".join(_CUES.sub(" ", text).split())
+        if not text:
+            continue
+        if cleaned and (text == cleaned[-1] or cleaned[-1].endswith(text)):
+            continue
+        if cleaned and text.startswith(cleaned[-1]):
+            # Rolling caption grew by a few words: keep only the longer version
+            cleaned[-1] = text
+            continue
+        cleaned.append(text)
+    return " ".join(cleaned)
+
+
+def _load_info(video_id: str, ydl) -> Dict:
+    if settings.TRANSCRIPT_FIXTURE_DIR:
+        with open(os.path.join(settings.TRANSCRIPT_FIXTURE_DIR, f"{video_id}.info.json"), encoding="utf-8") as f:
+            return json.load(f)
+    return ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+
+
+def _load_subtitle(fmt: Dict, ydl) -> str:
+    if settings.TRANSCRIPT_FIXTURE_DIR:
+        with open(os.path.join(settings.TRANSCRIPT_FIXTURE_DIR, fmt["url"]), encoding="utf-8") as f:
+            return f.read()
+    return ydl.urlopen(fmt["url"]).read().decode("utf-8")
+
+
+def _extract_transcript(video_id: str) -> Optional[Dict]:
+    """Blocking extraction; runs in the transcript worker pool."""
+    if settings.TRANSCRIPT_FIXTURE_DIR:
+        return _extract_with(video_id, None)
+
+    import yt_dlp
+    with yt_dlp.YoutubeDL(YDL_OPTIONS) as ydl:
+        return _extract_with(video_id, ydl)
+
+
+def _extract_with(video_id: str, ydl) -> Optional[Dict]:
+    info = _load_info(video_id, ydl)
+    selected = select_subtitle(info)
+    if not selected:
+        return None
+
+    lang, kind, fmt = selected
+    raw = _load_subtitle(fmt, ydl)
+    lines = parse_json3(raw) if fmt.get("ext") == "json3" else parse_vtt(raw)
+    content = normalize_transcript(lines)
+    if not content:
+        return None
+
+    return {
+        "video_id": video_id,
+        "title": info.get("title", ""),
+        "channel": info.get("channel") or info.get("uploader", ""),
+        "language": lang,
+        "source": kind,
+        "content": content
+    }
+
+
+async def get_transcript(url: str) -> Optional[Dict]:
+    """
+    Transcript for a YouTube URL (or bare video ID), or None if the video
+    has no usable English/Hindi subtitles.
+    """
+    video_id = url if _VIDEO_ID.match(url) else extract_video_id(url)
+    if not video_id:
+        return None
+
+    cached = await _transcripts.aget(video_id)
+    if cached:
+        return cached
+    if video_id in _unavailable:
+        return None
+
+    try:
+        loop = asyncio.get_running_loop()
+        transcript = await loop.run_in_executor(_executor, _extract_transcript, video_id)
+    except Exception as e:
+        print(f"Transcript extraction failed for {video_id}: {e}")
+        transcript = None
+
+    if not transcript:
+        _unavailable.set(video_id, True)
+        return None
+
+    await _transcripts.aset(video_id, transcript)
+    return transcript
+
+
+def get_transcript_stats() -> Dict:
+    return {
+        **_transcripts.stats(),
+        "unavailable": len(_unavailable),
+        "fixture_mode": bool(settings.TRANSCRIPT_FIXTURE_DIR)
+    }
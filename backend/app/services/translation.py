@@ -0,0 +1,198 @@
+"""
+Translation memory for /translate.
+
+Text is split into sentences and each (sentence hash, target language) pair
+is looked up in a persistent cache. Only sentences never seen before are
+sent to Gemini, together in one numbered JSON prompt, and the result is
+reassembled with the original spacing and line breaks.
+"""
+import asyncio
+import hashlib
+import re
+from typing import Dict, List, Tuple
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.core.cache import PersistentCache
+from app.core.config import settings
+from app.core.ledger import llm_ledger
+from app.core.llm import llm_manager, parse_json_response
+from app.services.extractive import SENTENCE_BOUNDARY
+
+LANGUAGE_NAMES = {
+    "hi": "Hindi",
+    "en": "English"
+}
+
+# Sentence boundaries (abbreviation-aware, including the Hindi danda) or line breaks
+_SEGMENT_SPLIT = re.compile(rf'({SENTENCE_BOUNDARY}|\n+)')
+
+_memory = PersistentCache(
+    "translations",
+    max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES,
+    ttl=settings.TRANSLATION_CACHE_TTL
+)
+
+_stats = {"sentences": 0, "memory_hits": 0, "translated": 0, "llm_calls": 0, "retried": 0}
+
+
+class TranslationError(Exception):
+    """Raised when Gemini didn't return a usable translation for a sentence."""
+
+
+def language_name(code: str) -> str:
+    return LANGUAGE_NAMES.get(code, "English")
+
+
+def split_segments(text: str) -> List[str]:
+    """
+    Split text into alternating [sentence, separator, sentence, ...] parts so
+    that "".join(parts) == text.
+    """
+    return _SEGMENT_SPLIT.split(text)
+
+
+def _needs_translation(segment: str) -> bool:
+    # Whitespace, numbers and punctuation read the same in every language
+    return bool(re.search(r'[^\W\d_]', segment))
+
+
+def _memory_key(sentence: str, target_language: str) -> str:
+    digest = hashlib.sha256(sentence.strip().encode("utf-8")).hexdigest()[:32]
+    return f"{target_language}:{digest}"
+
+
+def _batches(sentences: List[str], max_chars: int) -> List[List[str]]:
+    """Group sentences into prompts of at most max_chars, keeping their order."""
+    batches: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for sentence in sentences:
+        if current and size + len(sentence) > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence)
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _translate_batch(sentences: List[str], target_language: str) -> Dict[int, str]:
+    """One LLM call translating a numbered list of sentences; returns translations by index."""
+    target = language_name(target_language)
+    numbered = "\n".join(f"{i}. {sentence}" for i, sentence in enumerate(sentences))
+    prompt = f"""Translate each numbered line below to {target}. Preserve the meaning and tone.
+Translate every line separately, keeping the numbering.
+
+Respond with JSON only, in this exact format:
+{{"translations": [{{"id": 0, "text": "..."}}, ...]}}
+
+Lines:
+{numbered}
+"""
+    _stats["llm_calls"] += 1
+    response = await llm_manager.ainvoke([
+        SystemMessage(content=f"You are a professional translator for {target}."),
+        HumanMessage(content=prompt)
+    ], endpoint="translate")
+    try:
+        parsed = parse_json_response(response.content)
+        return {
+            int(item["id"]): item["text"]
+            for item in parsed.get("translations", [])
+            if item.get("text") and 0 <= int(item["id"]) < len(sentences)
+        }
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"Could not parse batched translation: {e}")
+        return {}
+
+
+async def _translate_single(sentence: str, target_language: str) -> str:
+    """Plain-text translation of one sentence, for sentences a batch reply dropped."""
+    target = language_name(target_language)
+    _stats["llm_calls"] += 1
+    _stats["retried"] += 1
+    response = await llm_manager.ainvoke([
+        SystemMessage(content=f"You are a professional translator for {target}."),
+        HumanMessage(content=f"Translate to {target}. Reply with the translation only.\n\n{sentence}")
+    ], endpoint="translate")
+    text = response.content.strip()
+    if not text:
+        raise TranslationError(f"No {target} translation returned for: {sentence[:80]}")
+    return text
+
+
+async def translate_sentences(sentences: List[str], target_language: str) -> Dict[str, str]:
+    """
+    Translate a set of sentences, using the translation memory first.
+    Returns a mapping from each (stripped) input sentence to its translation.
+    Sentences a batch reply left out (or an unparseable reply) are retried
+    one by one.
+
+    Raises:
+        LLMUnavailableError: If sentences are missing from memory and the LLM can't be called
+        TranslationError: If a sentence still has no translation after its retry
+    """
+    translations: Dict[str, str] = {}
+    missing: List[str] = []
+    for sentence in dict.fromkeys(s.strip() for s in sentences if _needs_translation(s)):
+        _stats["sentences"] += 1
+        cached = await _memory.aget(_memory_key(sentence, target_language))
+        if cached is not None:
+            _stats["memory_hits"] += 1
+            translations[sentence] = cached
+        else:
+            missing.append(sentence)
+    llm_ledger.record_cache("translate", not missing)
+
+    if missing:
+        batches = _batches(missing, settings.TRANSLATION_BATCH_CHARS)
+        results = await asyncio.gather(*(_translate_batch(b, target_language) for b in batches))
+        dropped: List[str] = []
+        for batch, translated in zip(batches, results):
+            for index, sentence in enumerate(batch):
+                if translated.get(index):
+                    translations[sentence] = translated[index]
+                else:
+                    dropped.append(sentence)
+        if dropped:
+            retried = await asyncio.gather(*(_translate_single(s, target_language) for s in dropped))
+            translations.update(zip(dropped, retried))
+        for sentence in missing:
+            await _memory.aset(_memory_key(sentence, target_language), translations[sentence])
+            _stats["translated"] += 1
+    return translations
+
+
+async def translate_texts(texts: List[str], target_language: str) -> List[str]:
+    """Translate several texts, sharing memory lookups and LLM batches across all of them."""
+    split_texts: List[List[str]] = [split_segments(text) for text in texts]
+    sentences = [part for parts in split_texts for part in parts[::2]]
+    translations = await translate_sentences(sentences, target_language)
+
+    results = []
+    for parts in split_texts:
+        rebuilt = []
+        for index, part in enumerate(parts):
+            if index % 2 == 0 and _needs_translation(part):
+                # Keep the sentence's own leading/trailing whitespace
+                leading = part[:len(part) - len(part.lstrip())]
+                trailing = part[len(part.rstrip()):]
+                rebuilt.append(leading + translations.get(part.strip(), part.strip()) + trailing)
+            else:
+                rebuilt.append(part)
+        results.append("".join(rebuilt))
+    return results
+
+
+async def translate_text(text: str, target_language: str) -> str:
+    """Translate text through the sentence-level translation memory."""
+    return (await translate_texts([text], target_language))[0]
+
+
+def get_translation_stats() -> dict:
+    sentences = _stats["sentences"]
+    return {
+        **_stats,
+        "memory_hit_rate": round(_stats["memory_hits"] / sentences, 3) if sentences else 0.0,
+        "memory": _memory.stats()
+    }
@@ -1,65 +1,289 @@
 """
 YouTube API service for fetching news videos
 """
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import httpx
 from app.core.config import settings
+from app.core.cache import PersistentCache
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import time
 
-_executor = ThreadPoolExecutor(max_workers=2)
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:
+    _QUOTA_TZ = None
 
+YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
 
-def _fetch_youtube_videos_sync(query: str, max_results: int = 15) -> List[Dict]:
+# videos.list accepts at most 50 comma-separated IDs per call
+VIDEOS_LIST_MAX_IDS = 50
+
+# Quota units charged per call (YouTube Data API v3 cost table)
+QUOTA_COSTS = {"search": 100, "videos": 1}
+
+# Results fetched per search; the cost is the same for any maxResults, so
+# fetch the maximum once and serve smaller limits from the cached list
+SEARCH_FETCH_SIZE = 50
+
+# Shared HTTP client, created lazily so the connection pool is reused across requests
+_client: Optional[httpx.AsyncClient] = None
+
+# Upstream call counts and latency per API resource
+_call_stats: Dict[str, Dict] = {}
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(base_url=YOUTUBE_API_BASE, timeout=10.0)
+    return _client
+
+
+def _record_call(resource: str, latency_ms: float, ok: bool) -> None:
+    stats = _call_stats.setdefault(
+        resource, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+    )
+    stats["calls"] += 1
+    stats["total_ms"] += latency_ms
+    stats["max_ms"] = max(stats["max_ms"], latency_ms)
+    if not ok:
+        stats["errors"] += 1
+
+
+class YouTubeQuota:
+    """
+    Daily quota ledger for the YouTube Data API.
+
+    Units are persisted per day so restarts don't forget what has already been
+    spent, and charged with an atomic increment in SQLite so several server
+    workers share one ledger. The API quota resets at midnight Pacific time.
+    """
+
+    def __init__(self, daily_limit: int, reserve: int):
+        self.daily_limit = daily_limit
+        self.reserve = reserve
+        # No memory layer: other workers update the same rows
+        self._store = PersistentCache("youtube_quota", max_entries=14, memory_entries=0)
+
+    def _today(self) -> str:
+        return datetime.now(_QUOTA_TZ).date().isoformat()
+
+    def spent(self) -> int:
+        return self._store.get(self._today(), 0)
+
+    def remaining(self) -> int:
+        return max(0, self.daily_limit - self.reserve - self.spent())
+
+    def remaining_fraction(self) -> float:
+        usable = self.daily_limit - self.reserve
+        return self.remaining() / usable if usable > 0 else 0.0
+
+    def can_afford(self, resource: str) -> bool:
+        return self.remaining() >= QUOTA_COSTS.get(resource, 1)
+
+    async def charge(self, resource: str) -> int:
+        """Record the units a call costs; returns the total spent today."""
+        # Google bills the call whether or not it succeeds
+        return await self._store.aincrement(self._today(), QUOTA_COSTS.get(resource, 1))
+
+    def stats(self) -> Dict:
+        return {
+            "day": self._today(),
+            "spent": self.spent(),
+            "remaining": self.remaining(),
+            "daily_limit": self.daily_limit,
+            "reserve": self.reserve,
+            "searches_left": self.remaining() // QUOTA_COSTS["search"]
+        }
+
+
+# Singleton instance
+youtube_quota = YouTubeQuota(settings.YOUTUBE_DAILY_QUOTA, settings.YOUTUBE_QUOTA_RESERVE)
+
+# Search results per normalized query; entries outlive their freshness TTL so
+# they can be served stale when quota runs low
+_video_cache = PersistentCache(
+    "youtube_videos",
+    max_entries=settings.YOUTUBE_CACHE_MAX_ENTRIES,
+    ttl=settings.YOUTUBE_CACHE_MAX_STALE
+)
+_cache_stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0}
+
+# Upstream fetches in flight per cache key, so concurrent misses share one search
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace-insensitive cache key; OR-terms are order-insensitive."""
+    terms = [" ".join(term.lower().split()) for term in query.split(" OR ")]
+    return " OR ".join(sorted(t for t in terms if t))
+
+
+def effective_ttl() -> float:
+    """
+    Freshness TTL, stretched as the daily quota drains.
+
+    Above half the budget the base TTL applies; below it the TTL grows in
+    inverse proportion to what is left (capped at YOUTUBE_CACHE_MAX_STALE).
+    """
+    base = settings.YOUTUBE_CACHE_TTL
+    fraction = youtube_quota.remaining_fraction()
+    if fraction >= 0.5:
+        return base
+    return min(settings.YOUTUBE_CACHE_MAX_STALE, base * 0.5 / max(fraction, 0.01))
+
+
+def get_youtube_stats() -> Dict:
+    """Upstream YouTube API calls and latency, per resource."""
+    return {
+        resource: {
+            "calls": s["calls"],
+            "errors": s["errors"],
+            "avg_ms": round(s["total_ms"] / s["calls"], 1) if s["calls"] else 0.0,
+            "max_ms": round(s["max_ms"], 1)
+        }
+        for resource, s in _call_stats.items()
+    }
+
+
+def get_video_cache_stats() -> Dict:
+    """Quota ledger plus cache hit/stale rates for the video endpoints."""
+    return {
+        "quota": youtube_quota.stats(),
+        "cache": {
+            **_cache_stats,
+            "entries": len(_video_cache),
+            "effective_ttl": round(effective_ttl()),
+        },
+        "upstream": get_youtube_stats()
+    }
+
+
+async def _api_get(resource: str, params: Dict) -> Dict:
+    """GET a YouTube Data API resource and return the decoded JSON body."""
+    await youtube_quota.charge(resource)
+    started = time.perf_counter()
+    ok = False
+    try:
+        response = await _get_client().get(
+            f"/{resource}", params={**params, "key": settings.YOUTUBE_API_KEY}
+        )
+        response.raise_for_status()
+        ok = True
+        return response.json()
+    finally:
+        _record_call(resource, (time.perf_counter() - started) * 1000, ok)
+
+
+async def _fetch_view_counts(video_ids: List[str]) -> Dict[str, int]:
+    """
+    Look up view counts for many videos with one videos.list call per 50 IDs
+    """
+    batches = [
+        video_ids[i:i + VIDEOS_LIST_MAX_IDS]
+        for i in range(0, len(video_ids), VIDEOS_LIST_MAX_IDS)
+    ]
+    responses = await asyncio.gather(
+        *[
+            _api_get("videos", {
+                "part": "statistics",
+                "id": ",".join(batch),
+                "maxResults": VIDEOS_LIST_MAX_IDS
+            })
+            for batch in batches
+        ],
+        return_exceptions=True
+    )
+
+    view_counts = {}
+    for response in responses:
+        if isinstance(response, Exception):
+            print(f"YouTube statistics lookup failed: {response}")
+            continue
+        for item in response.get("items", []):
+            view_counts[item["id"]] = int(item.get("statistics", {}).get("viewCount", 0))
+    return view_counts
+
+
+async def fetch_youtube_videos(query: str, max_results: int = 15) -> List[Dict]:
     """
-    Synchronous function to fetch YouTube videos
+    Fetch YouTube videos for a query, served from the quota-aware cache when possible
     """
-    if not settings.YOUTUBE_API_KEY:
-        print("Warning: YOUTUBE_API_KEY not configured")
+    key = normalize_query(query)
+    cached = await _video_cache.aget(key)
+    age = time.time() - cached["fetched_at"] if cached else None
+
+    if cached and age < effective_ttl():
+        _cache_stats["fresh_hits"] += 1
+        return cached["videos"][:max_results]
+
+    if not settings.YOUTUBE_API_KEY or not youtube_quota.can_afford("search"):
+        if cached:
+            _cache_stats["stale_hits"] += 1
+            return cached["videos"][:max_results]
+        if not settings.YOUTUBE_API_KEY:
+            print("Warning: YOUTUBE_API_KEY not configured")
+        else:
+            print(f"YouTube quota exhausted, no cached videos for '{key}'")
         return []
-    
+
+    _cache_stats["misses"] += 1
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_refresh(key, query))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    videos = await asyncio.shield(task)
+
+    if videos is None:
+        # Upstream failed: fall back to whatever we have, however old
+        return cached["videos"][:max_results] if cached else []
+
+    return videos[:max_results]
+
+
+async def _refresh(key: str, query: str) -> Optional[List[Dict]]:
+    videos = await _search_videos(query)
+    if videos is not None:
+        await _video_cache.aset(key, {"videos": videos, "fetched_at": time.time()})
+    return videos
+
+
+async def _search_videos(query: str) -> Optional[List[Dict]]:
+    """
+    One search call plus one batched statistics call. Returns None on failure.
+    """
     try:
-        youtube = build('youtube', 'v3', developerKey=settings.YOUTUBE_API_KEY)
-        
         # Calculate date for recent videos (last 7 days)
         published_after = (datetime.utcnow() - timedelta(days=7)).isoformat() + 'Z'
         
         # Search for news videos
-        search_response = youtube.search().list(
-            q=query,
-            part='id,snippet',
-            maxResults=max_results,
-            type='video',
-            order='date',  # Most recent first
-            publishedAfter=published_after,
-            relevanceLanguage='en',
-            safeSearch='moderate',
-            videoDuration='medium',  # 4-20 minutes
-            videoDefinition='high'
-        ).execute()
+        search_response = await _api_get("search", {
+            "q": query,
+            "part": "id,snippet",
+            "maxResults": SEARCH_FETCH_SIZE,
+            "type": "video",
+            "order": "date",  # Most recent first
+            "publishedAfter": published_after,
+            "relevanceLanguage": "en",
+            "safeSearch": "moderate",
+            "videoDuration": "medium",  # 4-20 minutes
+            "videoDefinition": "high"
+        })
+        
+        items = [
+            item for item in search_response.get('items', [])
+            if item.get('id', {}).get('videoId')
+        ]
+        view_counts = await _fetch_view_counts([item['id']['videoId'] for item in items])
         
         videos = []
-        for item in search_response.get('items', []):
-            video_id = item['id'].get('videoId')
-            if not video_id:
-                continue
-                
+        for item in items:
+            video_id = item['id']['videoId']
             snippet = item['snippet']
             
-            # Get video statistics
-            try:
-                video_response = youtube.videos().list(
-                    part='statistics,contentDetails',
-                    id=video_id
-                ).execute()
-                
-                stats = video_response['items'][0]['statistics'] if video_response.get('items') else {}
-                view_count = int(stats.get('viewCount', 0))
-            except:
-                view_count = 0
-            
             videos.append({
                 'id': f"yt_{video_id}",
                 'title': snippet.get('title', 'Untitled'),
@@ -70,7 +294,7 @@ def _fetch_youtube_videos_sync(query: str, max_results: int = 15) -> List[Dict]:
                             snippet.get('thumbnails', {}).get('medium', {}).get('url'),
                 'category': 'Video',
                 'published_at': snippet.get('publishedAt', ''),
-                'view_count': view_count,
+                'view_count': view_counts.get(video_id, 0),
                 'channel_title': snippet.get('channelTitle', 'YouTube')
             })
         
@@ -78,21 +302,12 @@ def _fetch_youtube_videos_sync(query: str, max_results: int = 15) -> List[Dict]:
         videos.sort(key=lambda x: x.get('view_count', 0), reverse=True)
         return videos
         
-    except HttpError as e:
-        print(f"YouTube API error: {e}")
-        return []
+    except httpx.HTTPStatusError as e:
+        print(f"YouTube API error: {e.response.status_code} {e.response.text[:200]}")
+        return None
     except Exception as e:
         print(f"Error fetching YouTube videos: {e}")
-        return []
-
-
-async def fetch_youtube_videos(query: str, max_results: int = 15) -> List[Dict]:
-    """
-    Async wrapper for fetching YouTube videos
-    """
-    loop = asyncio.get_running_loop()
-    videos = await loop.run_in_executor(_executor, _fetch_youtube_videos_sync, query, max_results)
-    return videos
+        return None
 
 
 async def fetch_news_videos(categories: Optional[List[str]] = None, max_results: int = 15) -> List[Dict]:
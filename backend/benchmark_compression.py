@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import glob
+import os
+import re
+import statistics
+import time
+from app.core.config import settings
+from app.core.ledger import estimate_tokens
+from app.services.extractive import STOPWORDS, compress_text, extractive_summary
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "articles")
+RUNS = 20
+
+# Measures what extractive compression saves on the fixture articles and
+# what it costs. Locally: tokens before/after compressing at --keep-ratio and
+# the median time of that compression and of a local extractive summary.
+# With --llm (needs GOOGLE_API_KEY) each article is also summarized by Gemini
+# from the full text and from the compressed text, reporting both call
+# latencies and how close the two summaries are (content-word F1, and the
+# share of the full-text summary's names and numbers the other one keeps).
+# Add more .txt articles to fixtures/articles to widen the sample.
+
+_WORD = re.compile(r"[a-z0-9]+")
+_FACT = re.compile(r"\b(?:[A-Z][a-z]+|\d[\d.,%]*)\b")
+
+
+def median_ms(fn, *args, **kwargs) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def content_words(text: str) -> set:
+    return {w for w in _WORD.findall(text.lower()) if w not in STOPWORDS}
+
+
+def overlap_f1(reference: str, candidate: str) -> float:
+    ref, cand = content_words(reference), content_words(candidate)
+    common = len(ref & cand)
+    if not common:
+        return 0.0
+    precision, recall = common / len(cand), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def fact_recall(reference: str, candidate: str) -> float:
+    facts = set(_FACT.findall(reference))
+    return len(facts & set(_FACT.findall(candidate))) / len(facts) if facts else 1.0
+
+
+async def timed_summary(title: str, content: str) -> tuple:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from app.core.llm import llm_manager
+    from app.services.summarizer import SUMMARY_SYSTEM_PROMPT, build_summary_prompt
+
+    start = time.perf_counter()
+    response = await llm_manager.ainvoke([
+        SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
+        HumanMessage(content=build_summary_prompt(title, content))
+    ], endpoint="summarize")
+    return response.content, time.perf_counter() - start
+
+
+async def compare_llm(articles: list, keep_ratio: float) -> None:
+    print(f"\n{'article':<20} {'full':>8} {'compr.':>8} {'F1':>6} {'facts':>6}")
+    f1s, recalls, full_times, compressed_times = [], [], [], []
+    for name, text in articles:
+        title = name.rsplit(".", 1)[0].replace("_", " ")
+        compressed = compress_text(text, max_tokens=settings.SUMMARY_INPUT_TOKEN_BUDGET, keep_ratio=keep_ratio)
+        full_summary, full_time = await timed_summary(title, text)
+        compressed_summary, compressed_time = await timed_summary(title, compressed)
+        f1s.append(overlap_f1(full_summary, compressed_summary))
+        recalls.append(fact_recall(full_summary, compressed_summary))
+        full_times.append(full_time)
+        compressed_times.append(compressed_time)
+        print(
+            f"{name[:20]:<20} {full_time:>7.2f}s {compressed_time:>7.2f}s "
+            f"{f1s[-1]:>6.2f} {recalls[-1]:>6.0%}"
+        )
+    print(
+        f"\nGemini latency: {statistics.mean(full_times):.2f}s full, "
+        f"{statistics.mean(compressed_times):.2f}s compressed; "
+        f"summary F1 {statistics.mean(f1s):.2f}, facts kept {statistics.mean(recalls):.0%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extractive prompt compression")
+    parser.add_argument(
+        "--keep-ratio", type=float, default=0.7,
+        help="ratio to evaluate (the server uses EXTRACTIVE_KEEP_RATIO, "
+             f"currently {settings.EXTRACTIVE_KEEP_RATIO})"
+    )
+    parser.add_argument("--llm", action="store_true", help="also compare Gemini summaries")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.txt")))
+    if not paths:
+        print(f"No fixture articles in {FIXTURE_DIR}")
+        return
+
+    articles = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            articles.append((os.path.basename(path), f.read()))
+
+    total_in = total_out = 0
+    options = {"max_tokens": settings.SUMMARY_INPUT_TOKEN_BUDGET, "keep_ratio": args.keep_ratio}
+    print(f"Keep ratio {args.keep_ratio}, token budget {settings.SUMMARY_INPUT_TOKEN_BUDGET}\n")
+    print(f"{'article':<20} {'tokens':>7} {'kept':>7} {'saved':>7} {'compress':>10} {'summary':>10}")
+    for name, text in articles:
+        tokens_in = estimate_tokens(text)
+        tokens_out = estimate_tokens(compress_text(text, **options))
+        total_in += tokens_in
+        total_out += tokens_out
+        print(
+            f"{name[:20]:<20} {tokens_in:>7} {tokens_out:>7} "
+            f"{1 - tokens_out / tokens_in:>7.1%} "
+            f"{median_ms(compress_text, text, **options):>8.2f}ms "
+            f"{median_ms(extractive_summary, text, settings.LOCAL_SUMMARY_TOKENS):>8.2f}ms"
+        )
+
+    print(f"\nTotal: {total_in} -> {total_out} tokens ({1 - total_out / total_in:.1%} fewer prompt tokens)")
+
+    if args.llm:
+        asyncio.run(compare_llm(articles, args.keep_ratio))
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,31 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.api.routes import router as news_router
+from app.api.admin import router as admin_router
 from app.core.config import settings
+from app.core.ledger import llm_ledger
+from app.services.corpus import article_corpus
+from app.services.digest import digest_service
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rebuild the chat corpus index in a worker thread before serving requests
+    loop = asyncio.get_running_loop()
+    documents = await loop.run_in_executor(None, article_corpus.load)
+    print(f"Article corpus loaded: {documents} documents")
+    # Pre-generate popular digests at the start of every time bucket
+    digest_service.start_scheduler()
+    yield
+    await digest_service.stop_scheduler()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description="AI-powered news aggregator using LangChain, LangGraph, and Gemini"
+    description="AI-powered news aggregator using LangChain, LangGraph, and Gemini",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -20,6 +39,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(news_router, prefix=settings.API_V1_STR + "/news", tags=["news"])
+app.include_router(admin_router, prefix=settings.API_V1_STR + "/admin", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -32,3 +52,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics for LLM usage"""
+    return llm_ledger.prometheus()
@@ -0,0 +1,56 @@
+import asyncio
+import time
+import httpx
+
+BASE_URL = "http://localhost:8000"
+CONCURRENT_CHATS = 5
+
+# Fire several chats at once while polling /health. If chat blocked the event
+# loop, health checks would stall for the length of a search or LLM call and
+# the chats would finish one after another instead of overlapping.
+
+async def chat(client: httpx.AsyncClient, i: int) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        f"{BASE_URL}/api/v1/news/chat",
+        json={"message": f"What's the latest in technology? ({i})", "history": []},
+        timeout=60
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Chat {i}: status {response.status_code} in {elapsed:.2f}s")
+    return elapsed
+
+async def poll_health(client: httpx.AsyncClient, stop: asyncio.Event) -> list:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(f"{BASE_URL}/health", timeout=60)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.1)
+    return latencies
+
+async def main():
+    async with httpx.AsyncClient() as client:
+        # Warm-up so connection setup isn't counted
+        await client.get(f"{BASE_URL}/health")
+
+        stop = asyncio.Event()
+        health_task = asyncio.create_task(poll_health(client, stop))
+
+        start = time.perf_counter()
+        chat_times = await asyncio.gather(*[chat(client, i) for i in range(CONCURRENT_CHATS)])
+        total = time.perf_counter() - start
+
+        stop.set()
+        health = await health_task
+
+    print(f"\nTotal wall time: {total:.2f}s, slowest chat: {max(chat_times):.2f}s, sum of chats: {sum(chat_times):.2f}s")
+    print(f"Health checks: {len(health)}, max latency {max(health) * 1000:.0f}ms")
+
+    overlapped = total < sum(chat_times) * 0.6
+    responsive = max(health) < 0.5
+    print(f"Chats overlapped: {'PASS' if overlapped else 'FAIL'}")
+    print(f"Event loop responsive: {'PASS' if responsive else 'FAIL'}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
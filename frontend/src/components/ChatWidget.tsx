@@ -13,6 +13,8 @@ const ChatWidget = () => {
   const [loading, setLoading] = useState(false);
   const [sources, setSources] = useState<string[]>([]);
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  const abortRef = useRef<AbortController | null>(null);
+  const sessionIdRef = useRef<string | null>(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -22,6 +24,14 @@ const ChatWidget = () => {
     scrollToBottom();
   }, [messages]);
 
+  // Stop any in-flight answer when the widget unmounts
+  useEffect(() => () => abortRef.current?.abort(), []);
+
+  const closeChat = () => {
+    abortRef.current?.abort();
+    setIsOpen(false);
+  };
+
   const sendMessage = async () => {
     if (!input.trim() || loading) return;
 
@@ -30,15 +40,47 @@ const ChatWidget = () => {
     setInput('');
     setLoading(true);
 
+    const controller = new AbortController();
+    abortRef.current = controller;
+    let started = false;
+    const appendToAnswer = (text: string) => {
+      if (!started) {
+        started = true;
+        setLoading(false);
+        setMessages(prev => [...prev, { role: 'assistant', content: text }]);
+      } else {
+        setMessages(prev => [
+          ...prev.slice(0, -1),
+          { ...prev[prev.length - 1], content: prev[prev.length - 1].content + text },
+        ]);
+      }
+    };
+
     try {
-      const response = await newsApi.chat(input, messages);
-      const assistantMessage: ChatMessage = { role: 'assistant', content: response.response };
-      setMessages(prev => [...prev, assistantMessage]);
-      setSources(response.sources || []);
+      await newsApi.chatStream(input, sessionIdRef.current, {
+        signal: controller.signal,
+        onEvent: (event, data) => {
+          if (event === 'session') {
+            sessionIdRef.current = data.session_id;
+          } else if (event === 'sources') {
+            setSources(data.sources || []);
+          } else if (event === 'token') {
+            appendToAnswer(data.text);
+          } else if (event === 'response') {
+            appendToAnswer(data.response);
+            setSources(data.sources || []);
+          } else if (event === 'error') {
+            appendToAnswer(started ? `\n\n${data.detail}` : data.detail);
+          }
+        },
+      });
     } catch (error) {
-      setMessages(prev => [...prev, { role: 'assistant', content: 'Sorry, I encountered an error. Please try again.' }]);
+      if (!controller.signal.aborted) {
+        setMessages(prev => [...prev, { role: 'assistant', content: 'Sorry, I encountered an error. Please try again.' }]);
+      }
     } finally {
       setLoading(false);
+      if (abortRef.current === controller) abortRef.current = null;
     }
   };
 
@@ -92,7 +134,7 @@ const ChatWidget = () => {
                 </div>
                 <span className="font-semibold">AI News Assistant</span>
               </div>
-              <button onClick={() => setIsOpen(false)} className="p-1 hover:bg-secondary rounded-lg">
+              <button onClick={closeChat} className="p-1 hover:bg-secondary rounded-lg">
                 <X className="w-5 h-5" />
               </button>
             </div>
@@ -0,0 +1,112 @@
+import { useState, useEffect } from 'react';
+import { motion } from 'framer-motion';
+import { Newspaper, Headphones, Loader2 } from 'lucide-react';
+import newsApi from '../services/api';
+import type { DigestResponse } from '../services/types';
+
+interface DailyDigestProps {
+  categories: string[];
+}
+
+// The spoken briefing is rendered after the digest itself, so ask once more for its audio_url
+const AUDIO_RETRY_MS = 15000;
+
+// "**Technology**: ..." paragraphs, with the bold category names kept bold
+const renderParagraph = (paragraph: string, index: number) => (
+  <p key={index} className="text-muted-foreground leading-relaxed">
+    {paragraph.split(/\*\*(.+?)\*\*/).map((part, i) =>
+      i % 2 === 1 ? <strong key={i} className="text-foreground">{part}</strong> : part
+    )}
+  </p>
+);
+
+const DailyDigest = ({ categories }: DailyDigestProps) => {
+  const [digest, setDigest] = useState<DigestResponse | null>(null);
+  const [loading, setLoading] = useState(true);
+  const [audioFailed, setAudioFailed] = useState(false);
+
+  useEffect(() => {
+    let cancelled = false;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+
+    const load = async (attempt: number) => {
+      try {
+        const response = await newsApi.getDigest(categories.slice(0, 3));
+        if (cancelled) return;
+        setDigest(response);
+        if (!response.audio_url && attempt === 0) {
+          retry = setTimeout(() => load(1), AUDIO_RETRY_MS);
+        }
+      } catch (err) {
+        console.error('Error fetching digest:', err);
+      } finally {
+        if (!cancelled) setLoading(false);
+      }
+    };
+
+    setLoading(true);
+    setAudioFailed(false);
+    load(0);
+    return () => {
+      cancelled = true;
+      clearTimeout(retry);
+    };
+  }, [categories]);
+
+  if (loading) {
+    return (
+      <div className="flex items-center justify-center gap-3 py-8 text-muted-foreground">
+        <Loader2 className="w-5 h-5 animate-spin" />
+        <span>Preparing your daily briefing...</span>
+      </div>
+    );
+  }
+
+  if (!digest || !digest.headlines.length) return null;
+
+  const [body] = digest.digest.split('\n\nTop headlines:');
+
+  return (
+    <motion.section
+      initial={{ opacity: 0, y: 20 }}
+      animate={{ opacity: 1, y: 0 }}
+      className="max-w-4xl mx-auto bg-card/80 backdrop-blur-sm rounded-2xl border border-border p-6 space-y-4 shadow-lg"
+    >
+      <div className="flex items-center justify-between gap-4">
+        <h2 className="flex items-center gap-2 text-xl font-bold text-special">
+          <Newspaper className="w-5 h-5 text-primary" />
+          Daily Briefing
+        </h2>
+        <span className="text-xs text-muted-foreground">
+          {new Date(digest.generated_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}
+        </span>
+      </div>
+
+      {digest.audio_url && !audioFailed && (
+        <div className="flex items-center gap-3 bg-secondary/40 rounded-xl p-3">
+          <Headphones className="w-5 h-5 text-primary shrink-0" />
+          {/* Streams from the audio cache; seeking uses Range requests */}
+          <audio
+            controls
+            preload="none"
+            className="w-full h-10"
+            src={newsApi.digestAudioSrc(digest.audio_url)}
+            onError={() => setAudioFailed(true)}
+          />
+        </div>
+      )}
+
+      <div className="space-y-3">
+        {body.split('\n\n').filter(Boolean).map(renderParagraph)}
+      </div>
+
+      <ol className="list-decimal list-inside space-y-1 text-sm">
+        {digest.headlines.map((headline, index) => (
+          <li key={index}>{headline}</li>
+        ))}
+      </ol>
+    </motion.section>
+  );
+};
+
+export default DailyDigest;
@@ -24,12 +24,24 @@ const ArticleTools = () => {
     }
     setLoading(true);
     setError('');
+    setSummary('');
     try {
-      const response = await newsApi.summarizeArticle(url);
-      setSummary(response.summary);
-      setArticleTitle(response.title || 'Article Summary');
+      await newsApi.summarizeArticleStream(url, {
+        onEvent: (event, data) => {
+          if (event === 'summary') {
+            setSummary(data.summary);
+            setArticleTitle(data.title || 'Article Summary');
+          } else if (event === 'status' && data.title !== undefined) {
+            setArticleTitle(data.title || 'Article Summary');
+          } else if (event === 'token') {
+            setSummary((prev) => prev + data.text);
+          } else if (event === 'error') {
+            setError(data.detail || 'Failed to summarize article');
+          }
+        },
+      });
     } catch (err: any) {
-      setError(err.response?.data?.detail || 'Failed to summarize article');
+      setError(err.message || 'Failed to summarize article');
     } finally {
       setLoading(false);
     }
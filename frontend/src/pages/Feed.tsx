@@ -6,31 +6,34 @@ import { Loader2, RefreshCw, Zap } from 'lucide-react';
 import { newsApi } from '../services/api';
 import type { NewsItem } from '../services/types';
 import Hero3D from '../components/Hero3D';
+import DailyDigest from '../components/DailyDigest';
+
+const loadSavedCategories = (): string[] => {
+  const savedPrefs = localStorage.getItem("newsflow_preferences");
+  if (savedPrefs) {
+    try {
+      const parsed = JSON.parse(savedPrefs);
+      if (parsed.categories && Array.isArray(parsed.categories)) {
+        return parsed.categories;
+      }
+    } catch (e) {
+      console.error("Failed to parse preferences", e);
+    }
+  }
+  return [];
+};
 
 const Feed = () => {
   const [news, setNews] = useState<NewsItem[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState('');
+  const [categories] = useState<string[]>(loadSavedCategories);
 
   const fetchNews = async (query?: string) => {
     setLoading(true);
     setError(null);
     try {
-      let categories: string[] = [];
-      
-      const savedPrefs = localStorage.getItem("newsflow_preferences");
-      if (savedPrefs) {
-        try {
-          const parsed = JSON.parse(savedPrefs);
-          if (parsed.categories && Array.isArray(parsed.categories)) {
-            categories = parsed.categories;
-          }
-        } catch (e) {
-          console.error("Failed to parse preferences", e);
-        }
-      }
-
       if (query) {
         const response = await newsApi.searchNews(query);
         setNews(response.news);
@@ -141,6 +144,8 @@ const Feed = () => {
         </div>
       </div>
 
+      {!searchQuery && <DailyDigest categories={categories} />}
+
       {loading && (
         <div className="flex flex-col items-center justify-center py-32 gap-6">
           <div className="relative">
@@ -15,6 +15,47 @@ export type { NewsItem, SearchResponse, TrendsResponse, FeedResponse, ChatRespon
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || "http://localhost:8000/api/v1";
 
+export interface StreamHandlers {
+  onEvent: (event: string, data: any) => void;
+  signal?: AbortSignal;
+}
+
+// POST a JSON body and dispatch the Server-Sent Events it streams back
+const postEventStream = async (path: string, body: unknown, { onEvent, signal }: StreamHandlers): Promise<void> => {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify(body),
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of message.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (data) onEvent(event, JSON.parse(data));
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+};
+
 const api = axios.create({
   baseURL: API_BASE_URL,
   headers: { "Content-Type": "application/json" },
@@ -45,16 +86,25 @@ export const newsApi = {
   },
 
   // NEW AI FEATURES
-  chat: async (message: string, history?: ChatMessage[]): Promise<ChatResponse> => {
-    const response = await api.post("/news/chat", { message, history });
+  chat: async (message: string, history?: ChatMessage[], sessionId?: string): Promise<ChatResponse> => {
+    const response = await api.post("/news/chat", { message, history, session_id: sessionId });
     return response.data;
   },
 
+  // The server keeps the conversation; pass the session_id it returned
+  // instead of resending history
+  chatStream: (message: string, sessionId: string | null, handlers: StreamHandlers): Promise<void> =>
+    postEventStream("/news/chat/stream", { message, session_id: sessionId }, handlers),
+
   getDigest: async (categories?: string[]): Promise<DigestResponse> => {
     const response = await api.post("/news/digest", { categories });
     return response.data;
   },
 
+  // audio_url is a server path ("/api/v1/news/digest/audio?..."); resolve it against the API host
+  digestAudioSrc: (audioUrl: string): string =>
+    new URL(audioUrl, new URL(API_BASE_URL, window.location.origin)).toString(),
+
   getRelated: async (query: string, limit: number = 5): Promise<{ related: NewsItem[]; query: string }> => {
     const response = await api.get(`/news/related/${encodeURIComponent(query)}`, { params: { limit } });
     return response.data;
@@ -66,6 +116,10 @@ export const newsApi = {
     return response.data;
   },
 
+  // Streams "status", "token", "summary", "done" and "error" events
+  summarizeArticleStream: (url: string, handlers: StreamHandlers): Promise<void> =>
+    postEventStream("/news/summarize/stream", { url }, handlers),
+
   summarizeVideo: async (url: string): Promise<SummarizeResponse> => {
     const response = await api.post("/news/summarize", { url });
     return response.data;
@@ -77,6 +131,11 @@ export const newsApi = {
     return response.data;
   },
 
+  translateFeed: async (items: NewsItem[], targetLanguage: string): Promise<{ success: boolean; items: NewsItem[]; target_language: string }> => {
+    const response = await api.post("/news/translate/feed", { items, target_language: targetLanguage });
+    return response.data;
+  },
+
   speakText: async (text: string, language: string): Promise<Blob> => {
     const response = await api.post("/news/speak", { text, language }, { responseType: 'blob' });
     return response.data;
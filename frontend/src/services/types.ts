@@ -42,22 +42,28 @@ export interface ChatMessage {
 export interface ChatResponse {
   response: string;
   sources?: string[];
+  session_id?: string;
 }
 
 export interface DigestResponse {
   digest: string;
   headlines: string[];
   generated_at: string;
+  cached?: boolean;
+  audio_url?: string;
 }
 
 export interface SummarizeRequest {
   url: string;
+  mode?: "auto" | "fast";
 }
 
 export interface SummarizeResponse {
   summary: string;
   title?: string;
   original_text?: string;
+  engine?: "gemini" | "extractive";
+  cached?: boolean;
 }
 
 export interface TranslateRequest {